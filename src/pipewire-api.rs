@@ -8,7 +8,7 @@ use tower_http::cors::CorsLayer;
 #[command(name = "pipewire-api")]
 #[command(about = "REST API server for SpeakerEQ 2x2 PipeWire plugin", long_about = None)]
 struct Args {
-    /// Port to listen on
+    /// Port to listen on (0 lets the OS pick a free port)
     #[arg(short, long, default_value_t = 2716)]
     port: u16,
 
@@ -27,6 +27,24 @@ struct Args {
     /// Log level: error, warn, info, debug, trace
     #[arg(long, default_value = "warn")]
     log_level: String,
+
+    /// Write the listening port and a newline to this inherited file
+    /// descriptor once the server accepts connections, then close it
+    #[arg(long)]
+    ready_fd: Option<i32>,
+}
+
+/// Tell the process that started the server which port it listens on
+fn notify_ready(fd: i32, port: u16) {
+    use std::io::Write;
+    use std::os::unix::io::FromRawFd;
+
+    // SAFETY: the descriptor was handed to us with --ready-fd for this
+    // purpose only; the File takes ownership and closes it when dropped
+    let mut file = unsafe { std::fs::File::from_raw_fd(fd) };
+    if let Err(e) = writeln!(file, "{}", port) {
+        tracing::warn!("Failed to write to ready fd {}: {}", fd, e);
+    }
 }
 
 #[tokio::main]
@@ -123,7 +141,11 @@ async fn main() -> Result<()> {
         .merge(pw_api::links::create_router(app_state.clone()))
         .merge(pw_api::speakereq::create_router(speakereq_state.clone()))
         .merge(pw_api::riaa::create_router(riaa_state.clone()))
-        .merge(pw_api::settings::create_router(speakereq_state, riaa_state, Some(10)))
+        .merge(pw_api::settings::create_router(
+            speakereq_state,
+            riaa_state,
+            Some(pw_api::settings::auto_save_interval_from_env().unwrap_or(10)),
+        ))
         .merge(pw_api::graph::create_graph_router().with_state(app_state))
         .layer(CorsLayer::permissive());
 
@@ -131,7 +153,14 @@ async fn main() -> Result<()> {
     let host = if args.localhost { "127.0.0.1" } else { "0.0.0.0" };
     let addr = format!("{}:{}", host, args.port);
     let listener = tokio::net::TcpListener::bind(&addr).await?;
-    tracing::info!("Server listening on http://{}", addr);
+    // Log the bound address so the actual port is visible with --port 0
+    let local_addr = listener.local_addr()?;
+    tracing::info!("Server listening on http://{}", local_addr);
+
+    // Connections are queued from here on, so the server counts as ready
+    if let Some(fd) = args.ready_fd {
+        notify_ready(fd, local_addr.port());
+    }
     
     axum::serve(listener, app).await?;
 
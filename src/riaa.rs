@@ -22,6 +22,30 @@ pub struct RiaaConfig {
     pub notch_q_factor: f32,
 }
 
+/// Partial update of the RIAA configuration; fields that are left out keep
+/// their current value
+#[derive(Debug, Default, Serialize, Deserialize)]
+pub struct RiaaConfigUpdate {
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub gain_db: Option<f32>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub subsonic_filter: Option<i32>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub riaa_enable: Option<bool>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub declick_enable: Option<bool>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub spike_threshold_db: Option<f32>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub spike_width_ms: Option<f32>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub notch_filter_enable: Option<bool>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub notch_frequency_hz: Option<f32>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub notch_q_factor: Option<f32>,
+}
+
 #[derive(Debug, Serialize, Deserialize)]
 pub struct GainValue {
     pub gain_db: f32,
@@ -130,6 +154,56 @@ pub async fn get_config(State(state): State<Arc<NodeState>>) -> Result<Json<Riaa
     }))
 }
 
+/// Set any subset of the RIAA settings with a single parameter update
+pub async fn set_config(
+    State(state): State<Arc<NodeState>>,
+    Json(update): Json<RiaaConfigUpdate>,
+) -> Result<Json<serde_json::Value>, ApiError> {
+    use std::collections::HashMap;
+    let mut params = HashMap::new();
+    
+    if let Some(v) = update.gain_db {
+        params.insert("riaa:Gain (dB)".to_string(), ParameterValue::Float(v));
+    }
+    if let Some(v) = update.subsonic_filter {
+        params.insert("riaa:Subsonic Filter".to_string(), ParameterValue::Int(v));
+    }
+    if let Some(v) = update.riaa_enable {
+        params.insert("riaa:RIAA Enable".to_string(), ParameterValue::Bool(v));
+    }
+    if let Some(v) = update.declick_enable {
+        params.insert("riaa:Declick Enable".to_string(), ParameterValue::Bool(v));
+    }
+    if let Some(v) = update.spike_threshold_db {
+        params.insert("riaa:Spike Threshold (dB)".to_string(), ParameterValue::Float(v));
+    }
+    if let Some(v) = update.spike_width_ms {
+        params.insert("riaa:Spike Width (ms)".to_string(), ParameterValue::Float(v));
+    }
+    if let Some(v) = update.notch_filter_enable {
+        params.insert("riaa:Notch Filter Enable".to_string(), ParameterValue::Bool(v));
+    }
+    if let Some(v) = update.notch_frequency_hz {
+        params.insert("riaa:Notch Frequency (Hz)".to_string(), ParameterValue::Float(v));
+    }
+    if let Some(v) = update.notch_q_factor {
+        params.insert("riaa:Notch Q Factor".to_string(), ParameterValue::Float(v));
+    }
+    
+    if params.is_empty() {
+        return Err(ApiError::BadRequest("No RIAA settings given".to_string()));
+    }
+    
+    state.set_parameters(params)?;
+    
+    // Echo the fields that were set, like the single-setting endpoints do
+    let mut response = serde_json::to_value(&update)
+        .map_err(|e| ApiError::Internal(e.to_string()))?;
+    response["status"] = serde_json::json!("ok");
+    
+    Ok(Json(response))
+}
+
 pub async fn get_gain(State(state): State<Arc<NodeState>>) -> Result<Json<GainValue>, ApiError> {
     let params = state.get_params()?;
     
@@ -363,7 +437,7 @@ pub async fn save_config(State(state): State<Arc<NodeState>>) -> Result<Json<ser
 // Create router for RIAA endpoints
 pub fn create_router(state: Arc<NodeState>) -> Router {
     Router::new()
-        .route("/api/v1/module/riaa/config", get(get_config))
+        .route("/api/v1/module/riaa/config", get(get_config).put(set_config))
         .route("/api/v1/module/riaa/gain", get(get_gain).put(set_gain))
         .route("/api/v1/module/riaa/subsonic", get(get_subsonic_filter).put(set_subsonic_filter))
         .route("/api/v1/module/riaa/riaa-enable", get(get_riaa_enable).put(set_riaa_enable))
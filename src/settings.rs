@@ -1,13 +1,15 @@
 use axum::{
     extract::State,
-    routing::post,
+    routing::{get, post},
     Json, Router,
 };
 use serde::{Deserialize, Serialize};
 use std::fs;
-use std::path::PathBuf;
+use std::path::{Path, PathBuf};
 use std::sync::Arc;
+use std::sync::atomic::{AtomicU64, Ordering};
 use std::collections::HashMap;
+use std::time::{SystemTime, UNIX_EPOCH};
 use tokio::sync::RwLock;
 use tokio::time::{interval, Duration};
 use tracing::info;
@@ -26,6 +28,10 @@ pub struct SettingsState {
 pub struct AutoSaveState {
     pub last_saved: RwLock<Option<String>>,
     pub interval_secs: u64,
+    /// Number of times the settings file was written, explicitly or by auto-save
+    pub saves_committed: AtomicU64,
+    /// Unix time in seconds of the last write, 0 if there was none yet
+    pub last_save_ts: AtomicU64,
 }
 
 impl AutoSaveState {
@@ -33,6 +39,8 @@ impl AutoSaveState {
         Self {
             last_saved: RwLock::new(None),
             interval_secs,
+            saves_committed: AtomicU64::new(0),
+            last_save_ts: AtomicU64::new(0),
         }
     }
     
@@ -42,8 +50,29 @@ impl AutoSaveState {
         Self {
             last_saved: RwLock::new(initial_content),
             interval_secs,
+            saves_committed: AtomicU64::new(0),
+            last_save_ts: AtomicU64::new(0),
         }
     }
+    
+    /// Count a successful write of the settings file
+    pub fn record_save(&self) {
+        let now = SystemTime::now()
+            .duration_since(UNIX_EPOCH)
+            .map(|d| d.as_secs())
+            .unwrap_or(0);
+        self.last_save_ts.store(now, Ordering::Relaxed);
+        self.saves_committed.fetch_add(1, Ordering::Relaxed);
+    }
+}
+
+/// Auto-save interval in seconds from PIPEWIRE_API_AUTOSAVE_INTERVAL, if set
+/// to a positive number
+pub fn auto_save_interval_from_env() -> Option<u64> {
+    std::env::var("PIPEWIRE_API_AUTOSAVE_INTERVAL")
+        .ok()
+        .and_then(|v| v.trim().parse::<u64>().ok())
+        .filter(|&secs| secs > 0)
 }
 
 /// Complete settings state for all modules
@@ -61,6 +90,13 @@ pub struct SaveResponse {
     pub message: String,
 }
 
+#[derive(Debug, Serialize, Deserialize)]
+pub struct StatsResponse {
+    pub interval_secs: u64,
+    pub saves_committed: u64,
+    pub last_save_ts: Option<u64>,
+}
+
 #[derive(Debug, Serialize, Deserialize)]
 pub struct RestoreResponse {
     pub success: bool,
@@ -84,6 +120,25 @@ pub fn get_settings_path() -> Result<PathBuf, ApiError> {
     Ok(state_dir.join("settings.json"))
 }
 
+/// Counter that gives every write_settings_file call its own temporary file
+static TMP_FILE_COUNTER: AtomicU64 = AtomicU64::new(0);
+
+/// Write the settings file atomically: the JSON goes to a temporary file in
+/// the same directory, which then replaces the settings file. Readers see
+/// either the old or the new content, never a partly written file.
+/// Concurrent writers use different temporary files.
+pub fn write_settings_file(path: &Path, json: &str) -> std::io::Result<()> {
+    let n = TMP_FILE_COUNTER.fetch_add(1, Ordering::Relaxed);
+    let mut tmp_name = path.file_name().unwrap_or_default().to_os_string();
+    tmp_name.push(format!(".tmp.{}.{}", std::process::id(), n));
+    let tmp_path = path.with_file_name(tmp_name);
+    if let Err(e) = fs::write(&tmp_path, json).and_then(|_| fs::rename(&tmp_path, path)) {
+        let _ = fs::remove_file(&tmp_path);
+        return Err(e);
+    }
+    Ok(())
+}
+
 /// Save current settings to disk
 pub async fn save_settings(
     State(state): State<SettingsState>,
@@ -93,15 +148,19 @@ pub async fn save_settings(
     // Get current settings as JSON
     let json = get_current_settings_json(&state).await?;
     
+    // Hold the lock auto-save holds while writing, so the two never write
+    // the settings file at the same time
+    let mut last_saved = state.auto_save.last_saved.write().await;
+    
     // Write to file
-    fs::write(&path, &json)
+    write_settings_file(&path, &json)
         .map_err(|e| ApiError::Internal(format!("Failed to write settings file: {}", e)))?;
     
     // Log to console for systemd journal
     info!("Settings saved to {}", path.display());
+    state.auto_save.record_save();
     
     // Update last_saved state
-    let mut last_saved = state.auto_save.last_saved.write().await;
     *last_saved = Some(json);
     
     Ok(Json(SaveResponse {
@@ -310,10 +369,11 @@ pub async fn auto_save_task(state: SettingsState) {
             // Save settings
             match get_settings_path() {
                 Ok(path) => {
-                    if let Err(e) = fs::write(&path, &current_json) {
+                    if let Err(e) = write_settings_file(&path, &current_json) {
                         eprintln!("Auto-save: Failed to write settings: {}", e);
                     } else {
                         *last_saved = Some(current_json);
+                        state.auto_save.record_save();
                         info!("Auto-save: Settings saved to {}", path.display());
                     }
                 }
@@ -325,6 +385,18 @@ pub async fn auto_save_task(state: SettingsState) {
     }
 }
 
+/// Report the auto-save interval and how often the settings file was written
+pub async fn get_stats(
+    State(state): State<SettingsState>,
+) -> Json<StatsResponse> {
+    let last_save_ts = state.auto_save.last_save_ts.load(Ordering::Relaxed);
+    Json(StatsResponse {
+        interval_secs: state.auto_save.interval_secs,
+        saves_committed: state.auto_save.saves_committed.load(Ordering::Relaxed),
+        last_save_ts: if last_save_ts == 0 { None } else { Some(last_save_ts) },
+    })
+}
+
 /// Create the settings router with both module states and start auto-save task
 pub fn create_router(
     speakereq_state: Arc<NodeState>,
@@ -354,6 +426,7 @@ pub fn create_router(
     Router::new()
         .route("/api/v1/settings/save", post(save_settings))
         .route("/api/v1/settings/restore", post(restore_settings))
+        .route("/api/v1/settings/stats", get(get_stats))
         .with_state(settings_state)
 }
 
@@ -477,6 +550,45 @@ mod tests {
         assert_eq!(deserialized.version, "2.0.9");
     }
 
+    #[test]
+    fn test_write_settings_file_replaces_atomically() {
+        let temp_dir = TempDir::new().unwrap();
+        let path = temp_dir.path().join("settings.json");
+        
+        write_settings_file(&path, "{\"version\": \"1\"}").unwrap();
+        write_settings_file(&path, "{\"version\": \"2\"}").unwrap();
+        
+        assert_eq!(fs::read_to_string(&path).unwrap(), "{\"version\": \"2\"}");
+        // The temporary file is renamed over the settings file, not left behind
+        assert_eq!(fs::read_dir(temp_dir.path()).unwrap().count(), 1);
+    }
+
+    #[test]
+    fn test_write_settings_file_concurrent_saves() {
+        let temp_dir = TempDir::new().unwrap();
+        let path = temp_dir.path().join("settings.json");
+        
+        // An explicit save and an auto-save may write at the same time
+        let writers: Vec<_> = ["{\"version\": \"1\"}", "{\"version\": \"2\"}"]
+            .into_iter()
+            .map(|json| {
+                let path = path.clone();
+                std::thread::spawn(move || {
+                    for _ in 0..200 {
+                        write_settings_file(&path, json).unwrap();
+                    }
+                })
+            })
+            .collect();
+        for writer in writers {
+            writer.join().unwrap();
+        }
+        
+        let content = fs::read_to_string(&path).unwrap();
+        assert!(content == "{\"version\": \"1\"}" || content == "{\"version\": \"2\"}");
+        assert_eq!(fs::read_dir(temp_dir.path()).unwrap().count(), 1);
+    }
+
     #[test]
     fn test_settings_path_format() {
         let _temp_dir = setup_test_env();
@@ -588,6 +700,19 @@ mod tests {
         });
     }
 
+    #[test]
+    fn test_auto_save_state_record_save() {
+        let auto_save = AutoSaveState::new(10);
+        assert_eq!(auto_save.saves_committed.load(Ordering::Relaxed), 0);
+        assert_eq!(auto_save.last_save_ts.load(Ordering::Relaxed), 0);
+        
+        auto_save.record_save();
+        auto_save.record_save();
+        
+        assert_eq!(auto_save.saves_committed.load(Ordering::Relaxed), 2);
+        assert!(auto_save.last_save_ts.load(Ordering::Relaxed) > 0);
+    }
+
     #[test]
     fn test_auto_save_state_update() {
         let auto_save = AutoSaveState::new(5);
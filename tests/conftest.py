@@ -11,30 +11,75 @@ For remote testing, set PIPEWIRE_API_REMOTE_URL environment variable:
     PIPEWIRE_API_REMOTE_URL=http://192.168.11.136:2716 pytest tests/
 
 Tests marked with @pytest.mark.local_only will be skipped in remote mode.
+
+To run the tests in parallel, install pytest-xdist and use:
+    pytest -n auto --dist=loadgroup tests/
+Each worker starts its own server. Modules that change shared PipeWire state
+are kept on one worker with @pytest.mark.xdist_group; the link tests instead
+split the output ports between workers.
+
+During local development, --reuse-server keeps the server running after the
+session so the next --reuse-server run skips the build check and startup.
 """
 
+import json
+import select
 import subprocess
 import signal
 import socket
 import time
 import os
 import atexit
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Optional
 import requests
 import pytest
+
+from pipewire_utils import find_speakereq_node
 import tempfile
-import shutil
+import fcntl
+
+try:
+    import psutil
+except ImportError:  # Optional, stray servers are then killed with pkill
+    psutil = None
 
 
 # Check if we're in remote mode
 REMOTE_URL = os.environ.get("PIPEWIRE_API_REMOTE_URL")
 IS_REMOTE_MODE = REMOTE_URL is not None
 
+# Auto-save interval (seconds) of the locally started server
+AUTOSAVE_INTERVAL = 1
+
 
 # Global server state
 _server_process = None
 _server_base_url = None
 _temp_home = None
 
+# pytest cache used to find a server left running by an earlier session
+# (--reuse-server), and the PID of such a server once it was adopted
+_reuse_cache = None
+_adopted_pid = None
+
+# Directories created by _makedirs, so repeated calls don't stat them again
+_dirs_created = set()
+
+# Environment variables passed through to the server. It only needs to find
+# the PipeWire/session bus sockets and the pw-cli/wpctl tools; HOME and
+# RUST_LOG are set explicitly.
+_SERVER_ENV_VARS = (
+    "PATH", "LANG", "LC_ALL", "USER", "LOGNAME",
+    "XDG_RUNTIME_DIR", "PIPEWIRE_RUNTIME_DIR", "PIPEWIRE_REMOTE",
+    "DBUS_SESSION_BUS_ADDRESS", "DISPLAY", "WAYLAND_DISPLAY",
+)
+
+# Repository root, used to build and locate the server binary
+_REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 def is_remote_mode():
     """Check if we're running against a remote server"""
@@ -45,82 +90,340 @@ def find_free_port():
     """Find a free port by letting the OS assign one"""
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.bind(('127.0.0.1', 0))
-        s.listen(1)
-        port = s.getsockname()[1]
-    return port
+        return s.getsockname()[1]
+
+
+def _wait_for_ready(process, ready_fd, timeout):
+    """
+    Wait for the port the server writes to its --ready-fd pipe.
+    
+    Sleeps in poll() on the pipe and, where the kernel supports it, a pidfd
+    of the server, so both readiness and a crash wake it up immediately.
+    
+    Returns:
+        The port, or None if the server exited or closed the pipe first
+    
+    Raises:
+        TimeoutError: Neither happened within timeout seconds
+    """
+    poller = select.poll()
+    poller.register(ready_fd, select.POLLIN)
+    pidfd = None
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(process.pid)
+            poller.register(pidfd, select.POLLIN)
+        except OSError:  # Kernel without pidfd support (< 5.3)
+            pidfd = None
+    # Without a pidfd, wake up regularly to check whether the server died
+    interval = None if pidfd is not None else 0.05
+    
+    data = b""
+    deadline = time.monotonic() + timeout
+    try:
+        while not data.endswith(b"\n"):
+            if process.poll() is not None:
+                return None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Server did not become ready in time")
+            wait = remaining if interval is None else min(remaining, interval)
+            for fd, _event in poller.poll(wait * 1000):
+                if fd == ready_fd:
+                    chunk = os.read(ready_fd, 32)
+                    if not chunk:
+                        return None
+                    data += chunk
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+    return int(data)
+
+
+def _server_binary_path():
+    """Path of the server binary.
+
+    PIPEWIRE_API_BIN selects a pre-built binary; otherwise the release build
+    is used, honouring CARGO_TARGET_DIR.
+    """
+    if os.environ.get("PIPEWIRE_API_BIN"):
+        return os.environ["PIPEWIRE_API_BIN"]
+    target_dir = os.environ.get("CARGO_TARGET_DIR", os.path.join(_REPO_DIR, "target"))
+    return os.path.join(target_dir, "release", "pipewire-api")
+
+
+def _newest_source_mtime():
+    """Return the newest modification time of the server sources"""
+    newest = 0.0
+    for name in ("Cargo.toml", "Cargo.lock"):
+        try:
+            newest = max(newest, os.path.getmtime(os.path.join(_REPO_DIR, name)))
+        except OSError:
+            pass
+    # scandir reports entry types from the directory listing itself, so
+    # only regular files need a stat call
+    pending = [os.path.join(_REPO_DIR, "src")]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                else:
+                    newest = max(newest, entry.stat().st_mtime)
+    return newest
+
+
+def _binary_is_current():
+    """Check whether the server binary is newer than its sources"""
+    try:
+        return os.path.getmtime(_server_binary_path()) >= _newest_source_mtime()
+    except OSError:
+        return False  # No binary yet
+
+
+def _build_server():
+    """Build the server unless the binary is already newer than its sources.
+
+    The build runs under an exclusive file lock, so when several pytest
+    processes (e.g. xdist workers) start at once only the first one invokes
+    cargo; the others wait for it and then find an up-to-date binary.
+
+    Set PIPEWIRE_API_SKIP_BUILD=1 to always use the existing release binary,
+    or PIPEWIRE_API_BIN to the path of a pre-built binary.
+    """
+    if os.environ.get("PIPEWIRE_API_SKIP_BUILD") == "1" or os.environ.get("PIPEWIRE_API_BIN"):
+        return
+    if _binary_is_current():
+        return
+    lock_path = os.path.join(tempfile.gettempdir(), "pipewire-api-test-build.lock")
+    with open(lock_path, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            # Another process may have finished the build while we waited
+            if _binary_is_current():
+                return
+            subprocess.run(
+                ["cargo", "build", "--release", "--quiet", "--bin", "pipewire-api"],
+                cwd=_REPO_DIR,
+                check=True,
+                capture_output=True
+            )
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _makedirs(path):
+    """os.makedirs(path, exist_ok=True), skipped for directories already created"""
+    if path in _dirs_created:
+        return
+    os.makedirs(path, exist_ok=True)
+    _dirs_created.add(path)
+
+
+def _read_log_tail(log_file, max_bytes=64 * 1024):
+    """Return the last max_bytes of a log file"""
+    with open(log_file, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > max_bytes:
+            f.seek(-max_bytes, os.SEEK_END)
+        return f.read().decode(errors="replace")
+
+
+def _reuse_cache_key():
+    """Cache key of the reusable server; xdist workers each have their own"""
+    return f"pipewire_api/server/{os.environ.get('PYTEST_XDIST_WORKER', 'main')}"
+
+
+def _binary_mtime_ns():
+    """Modification time of the server binary, or None if there is none"""
+    try:
+        return os.stat(_server_binary_path()).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _adopt_cached_server():
+    """
+    Reuse the server an earlier --reuse-server session left running.
+    
+    Only a server that still answers and runs the current binary is reused.
+    
+    Returns:
+        The base URL, or None if there is no usable server
+    """
+    global _server_base_url, _temp_home, _adopted_pid
+    
+    entry = _reuse_cache.get(_reuse_cache_key(), None)
+    if not entry:
+        return None
+    if os.environ.get("PIPEWIRE_API_SKIP_BUILD") != "1" and not os.environ.get("PIPEWIRE_API_BIN"):
+        if not _binary_is_current():
+            return None
+    if entry.get("binary_mtime_ns") != _binary_mtime_ns():
+        return None
+    try:
+        os.kill(entry["pid"], 0)
+        response = requests.get(f"{entry['url']}/api/v1/settings/stats", timeout=0.2)
+    except (OSError, requests.RequestException):
+        return None
+    if response.status_code != 200 or not os.path.isdir(entry["temp_home"]):
+        return None
+    
+    _adopted_pid = entry["pid"]
+    _temp_home = entry["temp_home"]
+    _server_base_url = entry["url"]
+    return _server_base_url
 
 
 def _start_server():
     """Start the API server and return the base URL"""
-    global _server_process, _server_base_url, _temp_home
+    global _server_base_url
     
     # In remote mode, just return the remote URL
     if IS_REMOTE_MODE:
         _server_base_url = REMOTE_URL
         return _server_base_url
     
-    if _server_process is not None:
+    if _server_process is not None or _adopted_pid is not None:
         return _server_base_url
     
-    # Create temporary HOME directory only if we don't have one
-    if _temp_home is None or not os.path.exists(_temp_home):
-        _temp_home = tempfile.mkdtemp(prefix="pipewire_api_test_")
+    if _reuse_cache is not None and _adopt_cached_server() is not None:
+        return _server_base_url
     
-    config_dir = os.path.join(_temp_home, ".config", "pipewire-api")
-    state_dir = os.path.join(_temp_home, ".state", "pipewire-api")
-    os.makedirs(config_dir, exist_ok=True)
-    os.makedirs(state_dir, exist_ok=True)
+    # Build the server if needed, while the rest of the setup runs
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        build = executor.submit(_build_server)
+        url = _launch_server(build)
     
-    port = find_free_port()
-    _server_base_url = f"http://127.0.0.1:{port}"
+    if _reuse_cache is not None:
+        _reuse_cache.set(_reuse_cache_key(), {
+            "pid": _server_process.pid,
+            "url": url,
+            "temp_home": _temp_home,
+            "binary_mtime_ns": _binary_mtime_ns(),
+        })
+    return url
+
+
+def _launch_server(build):
+    """Prepare HOME, port and log, wait for the build, then start the server"""
+    global _server_process, _server_base_url, _temp_home
     
-    # Build the server if not already built
-    build_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    subprocess.run(
-        ["cargo", "build", "--release", "--bin", "pipewire-api"],
-        cwd=build_dir,
-        check=True,
-        capture_output=True
-    )
+    # Create temporary HOME directory only if we don't have one
+    if _temp_home is not None:
+        try:
+            os.stat(_temp_home)
+        except FileNotFoundError:
+            _temp_home = None
+    if _temp_home is None:
+        _temp_home = tempfile.mkdtemp(prefix="pipewire_api_test_")
+    
+    _makedirs(os.path.join(_temp_home, ".config", "pipewire-api"))
+    _makedirs(os.path.join(_temp_home, ".state", "pipewire-api"))
     
-    # Start the server with isolated HOME
-    server_path = os.path.join(build_dir, "target", "release", "pipewire-api")
-    env = os.environ.copy()
+    # Start the server with isolated HOME. It binds an OS-assigned port
+    # (--port 0) and reports it through the ready pipe once it listens.
+    server_path = _server_binary_path()
+    env = {name: os.environ[name] for name in _SERVER_ENV_VARS if name in os.environ}
     env["HOME"] = _temp_home
     env["RUST_LOG"] = "debug"  # Enable debug logging to trace caching issues
+    # Short auto-save interval so the auto-save tests don't wait 10 s per cycle
+    env["PIPEWIRE_API_AUTOSAVE_INTERVAL"] = str(AUTOSAVE_INTERVAL)
     
     # Log file for debugging
     log_file = os.path.join(_temp_home, "server.log")
-    log_handle = open(log_file, 'w')
-    
-    _server_process = subprocess.Popen(
-        [server_path, "--port", str(port), "--localhost"],
-        stdout=log_handle,
-        stderr=subprocess.STDOUT,
-        preexec_fn=os.setsid,
-        env=env
-    )
+    log_fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o644)
+    ready_r, ready_w = os.pipe()
+    try:
+        build.result()
+        _server_process = subprocess.Popen(
+            [server_path, "--port", "0", "--localhost", "--ready-fd", str(ready_w)],
+            stdout=log_fd,
+            stderr=subprocess.STDOUT,
+            pass_fds=(ready_w,),
+            preexec_fn=os.setsid,
+            env=env
+        )
+    except BaseException:
+        os.close(ready_r)
+        raise
+    finally:
+        # The server writes to its own copies of the descriptors
+        os.close(log_fd)
+        os.close(ready_w)
     
-    # Wait for server to be ready
-    max_retries = 50
-    for _ in range(max_retries):
-        if _server_process.poll() is not None:
-            log_handle.close()
-            with open(log_file, 'r') as f:
-                log_content = f.read()
-            raise RuntimeError(f"Server failed to start. Log:\n{log_content}")
-        try:
-            requests.get(f"{_server_base_url}/api/v1/ls", timeout=0.5)
-            break
-        except requests.exceptions.ConnectionError:
-            time.sleep(0.1)
-    else:
+    try:
+        port = _wait_for_ready(_server_process, ready_r, timeout=10)
+    except TimeoutError:
         _server_process.terminate()
         raise RuntimeError("Server did not become ready in time")
+    finally:
+        os.close(ready_r)
+    if port is None:
+        if _server_process.poll() is None:
+            _server_process.terminate()
+        log_content = _read_log_tail(log_file)
+        raise RuntimeError(f"Server failed to start. Log:\n{log_content}")
     
+    _server_base_url = f"http://127.0.0.1:{port}"
     return _server_base_url
 
 
+def _wait_for_exit(process, timeout):
+    """
+    Wait up to timeout seconds for process to exit and reap it.
+    
+    Polls a pidfd where available, which wakes up as soon as the process
+    exits instead of in Popen.wait()'s sleep steps.
+    
+    Returns:
+        True if the process exited
+    """
+    pidfd = None
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(process.pid)
+        except OSError:  # Already reaped, or kernel without pidfd support
+            pidfd = None
+    if pidfd is None:
+        try:
+            process.wait(timeout=timeout)
+            return True
+        except subprocess.TimeoutExpired:
+            return False
+    
+    try:
+        poller = select.poll()
+        poller.register(pidfd, select.POLLIN)
+        if not poller.poll(timeout * 1000):
+            return False
+    finally:
+        os.close(pidfd)
+    process.wait()
+    return True
+
+
+def _stop_adopted_server():
+    """Stop a server adopted from an earlier session; it is not our child"""
+    global _adopted_pid, _server_base_url
+    
+    try:
+        os.killpg(os.getpgid(_adopted_pid), signal.SIGTERM)
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            os.kill(_adopted_pid, 0)
+            time.sleep(0.01)
+        os.killpg(os.getpgid(_adopted_pid), signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    _adopted_pid = None
+    _server_base_url = None
+
+
 def _stop_server():
     """Stop the API server (does NOT cleanup temp directory)"""
     global _server_process, _server_base_url
@@ -129,48 +432,122 @@ def _stop_server():
     if IS_REMOTE_MODE:
         return
     
+    if _adopted_pid is not None:
+        _stop_adopted_server()
+    
     if _server_process is not None:
+        # The server runs in its own session, so signal the whole group.
+        # It has no SIGTERM handler and normally exits at once; if it is
+        # stuck (e.g. in a PipeWire call) kill it after a short grace period.
         try:
-            os.killpg(os.getpgid(_server_process.pid), signal.SIGTERM)
-            _server_process.wait(timeout=5)
-        except Exception:
-            try:
-                _server_process.kill()
-            except Exception:
-                pass
+            pgid = os.getpgid(_server_process.pid)
+            os.killpg(pgid, signal.SIGTERM)
+            if not _wait_for_exit(_server_process, 0.2):
+                os.killpg(pgid, signal.SIGKILL)
+                _server_process.wait(timeout=1)
+        except (ProcessLookupError, subprocess.TimeoutExpired):
+            pass
         _server_process = None
         _server_base_url = None
 
 
+def _remove_tree(path):
+    """Remove a directory tree, ignoring errors.
+
+    Walks the tree iteratively with os.scandir, whose entries already know
+    whether they are directories, so no extra stat is needed per file.
+    Directories are removed on the way back up.
+    """
+    stack = [(path, False)]
+    while stack:
+        current, visited = stack.pop()
+        if visited:
+            try:
+                os.rmdir(current)
+            except OSError:
+                pass
+            continue
+        stack.append((current, True))
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, False))
+                    else:
+                        try:
+                            os.unlink(entry.path)
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+
+
 def _cleanup_temp_home():
     """Cleanup temporary HOME directory"""
     global _temp_home
     if _temp_home and os.path.exists(_temp_home):
-        shutil.rmtree(_temp_home, ignore_errors=True)
+        _remove_tree(_temp_home)
+        _dirs_created.clear()
         _temp_home = None
 
 
+def _stop_server_at_exit():
+    """Stop the server at exit unless it is kept for the next session"""
+    if _reuse_cache is None:
+        _stop_server()
+
+
 # Register cleanup at exit (safety net)
-atexit.register(_stop_server)
+atexit.register(_stop_server_at_exit)
 # Disable temp cleanup for debugging
 # atexit.register(_cleanup_temp_home)
 
 
+def _kill_stray_servers():
+    """Terminate pipewire-api processes left over from earlier runs"""
+    if psutil is None:
+        try:
+            result = subprocess.run(
+                ["pkill", "-9", "-f", "pipewire-api"],
+                capture_output=True,
+                timeout=5
+            )
+            # pkill exits with 0 only if it matched a process
+            if result.returncode == 0:
+                time.sleep(0.5)
+        except Exception:
+            pass
+        return
+    
+    strays = [p for p in psutil.process_iter(["name"])
+              if p.info["name"] == "pipewire-api" and p.pid != os.getpid()]
+    if not strays:
+        return
+    for proc in strays:
+        try:
+            proc.terminate()
+        except psutil.Error:
+            pass
+    _gone, alive = psutil.wait_procs(strays, timeout=0.5)
+    for proc in alive:
+        try:
+            proc.kill()
+        except psutil.Error:
+            pass
+
+
 def pytest_sessionstart(session):
-    """Called before test collection - kill any stray servers"""
+    """Called before test collection - optionally kill stray servers.
+
+    Servers are stopped when the session ends, so leftovers only occur after
+    a crashed run. Set PIPEWIRE_API_KILL_STRAYS=1 to clean them up.
+    """
     # In remote mode, don't kill any servers
     if IS_REMOTE_MODE:
         return
     
-    try:
-        subprocess.run(
-            ["pkill", "-9", "-f", "pipewire-api"],
-            capture_output=True,
-            timeout=5
-        )
-        time.sleep(0.5)
-    except Exception:
-        pass
+    if os.environ.get("PIPEWIRE_API_KILL_STRAYS") == "1":
+        _kill_stray_servers()
 
 
 def pytest_sessionfinish(session, exitstatus):
@@ -179,35 +556,131 @@ def pytest_sessionfinish(session, exitstatus):
     if IS_REMOTE_MODE:
         return
     
-    _stop_server()
+    # With --reuse-server the server is left running for the next session
+    if _reuse_cache is None:
+        _stop_server()
     # Skip cleanup to preserve logs for debugging
     # _cleanup_temp_home()
-    # Final cleanup of any stray processes
-    try:
-        subprocess.run(
-            ["pkill", "-9", "-f", "pipewire-api"],
-            capture_output=True,
-            timeout=5
-        )
-    except Exception:
-        pass
+
+
+def pytest_addoption(parser):
+    """Register the --reuse-server option"""
+    parser.addoption(
+        "--reuse-server",
+        action="store_true",
+        default=False,
+        help="keep the local API server running after the session and reuse it "
+             "in the next --reuse-server session, as long as the binary is unchanged. "
+             "Server state (settings, volume state) carries over between sessions.",
+    )
 
 
 def pytest_configure(config):
     """Register custom markers"""
+    global _reuse_cache
+    if config.getoption("reuse_server") and getattr(config, "cache", None) is not None:
+        _reuse_cache = config.cache
     config.addinivalue_line(
         "markers", "local_only: mark test as requiring local server access (state files, PipeWire CLI tools)"
     )
+    # Provided by pytest-xdist; registered here too so runs without it don't warn
+    config.addinivalue_line(
+        "markers", "xdist_group(name): run all tests of a group on the same xdist worker"
+    )
 
 
 def pytest_collection_modifyitems(config, items):
     """Auto-skip local_only tests when running in remote mode"""
     if not IS_REMOTE_MODE:
         return
+    local_items = [item for item in items if "local_only" in item.keywords]
+    if not local_items:
+        return
     skip_local = pytest.mark.skip(reason="test requires local server access")
-    for item in items:
-        if "local_only" in item.keywords:
-            item.add_marker(skip_local)
+    for item in local_items:
+        item.add_marker(skip_local)
+
+
+@dataclass(slots=True)
+class TestEnv:
+    """Handle on the test server returned by the test_env fixture"""
+    base_url: str
+    temp_home: Optional[str]
+    is_remote: bool = False
+    urls: SimpleNamespace = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self._build_urls()
+    
+    def _build_urls(self):
+        """Precompute the fixed endpoint URLs for the current base_url"""
+        api = f"{self.base_url}/api/v1"
+        self.urls = SimpleNamespace(
+            ls=f"{api}/ls",
+            cache_refresh=f"{api}/cache/refresh",
+            graph=f"{api}/graph",
+            graph_png=f"{api}/graph/png",
+            links=f"{api}/links",
+            links_exists=f"{api}/links/exists",
+            links_by_name=f"{api}/links/by-name",
+            ports_output=f"{api}/links/ports/output",
+            ports_input=f"{api}/links/ports/input",
+            volume=f"{api}/volume",
+            volume_save=f"{api}/volume/save",
+            default_sink=f"{api}/defaults/sink",
+            default_source=f"{api}/defaults/source",
+        )
+    
+    def read_state_file(self):
+        """Read the current state file. Returns None in remote mode."""
+        if self.is_remote or self.temp_home is None:
+            return None
+        state_path = os.path.join(self.temp_home, ".state", "pipewire-api", "volume.state")
+        if os.path.exists(state_path):
+            with open(state_path, 'r') as f:
+                return json.load(f)
+        return None
+    
+    def create_state_file(self, state):
+        """Create a state file with the given content. No-op in remote mode."""
+        if self.is_remote or self.temp_home is None:
+            return
+        state_path = os.path.join(self.temp_home, ".state", "pipewire-api", "volume.state")
+        _makedirs(os.path.dirname(state_path))
+        with open(state_path, 'w') as f:
+            f.write(json.dumps(state))
+    
+    def create_volume_config(self, config):
+        """Create a volume config file with the given content. No-op in remote mode."""
+        if self.is_remote or self.temp_home is None:
+            return
+        config_path = os.path.join(self.temp_home, ".config", "pipewire-api", "volume.conf")
+        _makedirs(os.path.dirname(config_path))
+        with open(config_path, 'w') as f:
+            f.write(json.dumps(config))
+    
+    def stop_server(self):
+        """Stop the API server. No-op in remote mode."""
+        if not self.is_remote:
+            _stop_server()
+    
+    def start_server(self):
+        """Start the API server. No-op in remote mode."""
+        if not self.is_remote:
+            _start_server()
+            self.base_url = _server_base_url
+            self.temp_home = _temp_home
+            self._build_urls()
+    
+    def read_server_log(self):
+        """Read the server log file. Returns None in remote mode."""
+        if self.is_remote or self.temp_home is None:
+            return None
+        log_path = os.path.join(self.temp_home, "server.log")
+        if os.path.exists(log_path):
+            with open(log_path, 'r') as f:
+                return f.read()
+        return None
 
 
 @pytest.fixture(scope="session")
@@ -225,70 +698,81 @@ def test_env():
     Alias for api_server for backward compatibility with tests using test_env.
     Returns an object with base_url attribute.
     """
-    class TestEnv:
-        def __init__(self, base_url, temp_home, is_remote=False):
-            self.base_url = base_url
-            self.temp_home = temp_home
-            self.is_remote = is_remote
-        
-        def read_state_file(self):
-            """Read the current state file. Returns None in remote mode."""
-            if self.is_remote or self.temp_home is None:
-                return None
-            state_path = os.path.join(self.temp_home, ".state", "pipewire-api", "volume.state")
-            if os.path.exists(state_path):
-                import json
-                with open(state_path, 'r') as f:
-                    return json.load(f)
-            return None
-        
-        def create_state_file(self, state):
-            """Create a state file with the given content. No-op in remote mode."""
-            if self.is_remote or self.temp_home is None:
-                return
-            import json
-            state_path = os.path.join(self.temp_home, ".state", "pipewire-api", "volume.state")
-            os.makedirs(os.path.dirname(state_path), exist_ok=True)
-            with open(state_path, 'w') as f:
-                json.dump(state, f, indent=2)
-        
-        def create_volume_config(self, config):
-            """Create a volume config file with the given content. No-op in remote mode."""
-            if self.is_remote or self.temp_home is None:
-                return
-            import json
-            config_path = os.path.join(self.temp_home, ".config", "pipewire-api", "volume.conf")
-            os.makedirs(os.path.dirname(config_path), exist_ok=True)
-            with open(config_path, 'w') as f:
-                json.dump(config, f, indent=2)
-        
-        def stop_server(self):
-            """Stop the API server. No-op in remote mode."""
-            if not self.is_remote:
-                _stop_server()
-        
-        def start_server(self):
-            """Start the API server. No-op in remote mode."""
-            global _server_base_url, _temp_home
-            if not self.is_remote:
-                _start_server()
-                self.base_url = _server_base_url
-                self.temp_home = _temp_home
-        
-        def read_server_log(self):
-            """Read the server log file. Returns None in remote mode."""
-            if self.is_remote or self.temp_home is None:
-                return None
-            log_path = os.path.join(self.temp_home, "server.log")
-            if os.path.exists(log_path):
-                with open(log_path, 'r') as f:
-                    return f.read()
-            return None
-    
     _start_server()
     return TestEnv(_server_base_url, _temp_home, IS_REMOTE_MODE)
 
 
+@pytest.fixture(scope="session")
+def http():
+    """
+    Session-scoped requests.Session shared by all tests.
+    Keeps connections to the API server alive between requests.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def settings_file_path(api_server, http):
+    """
+    Session-scoped path of the settings file, learned from one
+    POST /api/v1/settings/save. The server never changes it while running.
+    """
+    response = http.post(f"{api_server}/api/v1/settings/save")
+    assert response.status_code == 200, "Could not determine the settings file path"
+    return response.json()["path"]
+
+
+@pytest.fixture(scope="session")
+def speakereq_node(api_server):
+    """
+    Session-scoped (node_id, node_name) of the speakereq sink, looked up once
+    with pw-cli. (None, None) if there is no speakereq node.
+    """
+    return find_speakereq_node()
+
+
+def find_riaa_node(base_url, http):
+    """ID of the RIAA node in the PipeWire graph, or None if there is none"""
+    response = http.get(f"{base_url}/api/v1/ls")
+    assert response.status_code == 200
+    for obj in response.json().get("objects", []):
+        if obj.get("name") == "riaa" and obj.get("type") == "node":
+            return obj["id"]
+    return None
+
+
+@pytest.fixture(scope="session")
+def riaa_node_id(api_server, http):
+    """
+    Session-scoped ID of the RIAA node, looked up once.
+    Skips the requesting tests if there is no RIAA node.
+    """
+    node_id = find_riaa_node(api_server, http)
+    if node_id is None:
+        pytest.skip("RIAA node not found")
+    return node_id
+
+
+@pytest.fixture(scope="session")
+def riaa_snapshot(api_server, http, riaa_node_id):
+    """RIAA configuration as it was before the first test that changed it"""
+    response = http.get(f"{api_server}/api/v1/module/riaa/config")
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture
+def riaa_restore(api_server, http, riaa_snapshot):
+    """Put the RIAA configuration back to the session snapshot after a test"""
+    yield
+    response = http.put(f"{api_server}/api/v1/module/riaa/config", json=riaa_snapshot)
+    assert response.status_code == 200, f"Restoring the RIAA configuration failed: {response.text}"
+
+
 @pytest.fixture(scope="session")
 def skip_if_remote(test_env):
     """Fixture that skips the test if running in remote mode"""
@@ -0,0 +1,54 @@
+"""Lightweight JSON-over-HTTP helpers for hot request loops in the tests."""
+import json
+from typing import Any, Optional, Tuple
+
+import urllib3
+
+try:
+    import orjson
+except ImportError:  # Optional, falls back to the stdlib json module
+    orjson = None
+
+
+# One pool shared by all helpers; the test server is a single host
+_POOL = urllib3.PoolManager(num_pools=1, maxsize=8)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode()
+
+
+def jload(response: Any) -> Any:
+    """Decode the JSON body of a requests response, like response.json()."""
+    return _loads(response.content)
+
+
+def get_json(url: str) -> Any:
+    """GET a URL and return the decoded JSON body."""
+    return _loads(_POOL.request("GET", url).data)
+
+
+def put_json(url: str, payload: Any) -> Tuple[int, Optional[Any]]:
+    """
+    PUT a JSON payload to a URL.
+
+    Returns:
+        (status code, decoded JSON body or None if it is empty or not JSON)
+    """
+    response = _POOL.request("PUT", url, body=_dumps(payload), headers=_JSON_HEADERS)
+    if not response.data:
+        return response.status, None
+    try:
+        return response.status, _loads(response.data)
+    except ValueError:  # Error responses may be plain text
+        return response.status, None
@@ -1,13 +1,168 @@
 """Utility functions for testing PipeWire parameter operations."""
+import functools
+import json
+import os
 import subprocess
 import re
-from typing import Optional, Union
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
 
+try:
+    import orjson
+except ImportError:  # Optional, falls back to the stdlib json module
+    orjson = None
 
-def get_pipewire_param(node_id: int, param_name: str) -> Optional[Union[float, int, bool, str]]:
+
+ParamValue = Union[float, int, bool, str]
+
+# How long (in seconds) a parsed pw-cli enum-params result is reused
+_PARAM_CACHE_TTL = 0.25
+
+# Timeout (in seconds) for a single pw-cli invocation
+_PW_CLI_TIMEOUT = 5
+
+# pw-cli prints each parameter as a name line followed by its typed value, e.g.
+#   String "riaa:Gain (dB)"
+#   Float 0.000000
+_PARAM_HDR_RE = re.compile(r'\s*String\s+"(?P<name>[^"]+)"')
+_VALUE_RE = re.compile(
+    r'\s*(?:Float\s+(?P<f>[-+]?[0-9]*\.?[0-9]+)'
+    r'|Int\s+(?P<i>[-+]?[0-9]+)'
+    r'|Bool\s+(?P<b>true|false)'
+    r'|String\s+"(?P<s>[^"]+)")'
+)
+
+# A speakereq sink in pw-cli list-objects output: the object's id line,
+# followed (within the same object) by its node.name and media.class lines
+_SPEAKEREQ_NODE_RE = re.compile(
+    r'^[ \t]*id (?P<id>\d+), type [^\n]*\n'
+    r'(?:(?![ \t]*id \d+,)[^\n]*\n){0,20}?'
+    r'[^\n]*node\.name = "(?P<name>speakereq\d+x\d+)"[^\n]*\n'
+    r'[^\n]*media\.class = "Audio/Sink"',
+    re.MULTILINE
+)
+
+# A prefixed parameter name line and the raw value after its type, e.g.
+#   String "speakereq2x2:output_0_eq_5_f"
+#   Float 1000.000000
+_PREFIXED_PARAM_RE = re.compile(
+    r'String "(?P<node>[^":]+):(?P<name>[^"]+)"[ \t]*\n[ \t]*\S+[ \t]+(?P<value>[^\n]*?)[ \t]*$',
+    re.MULTILINE
+)
+
+# node_id -> (monotonic timestamp, parsed Props parameters, whether the
+# output was read to the end or cut short once a wanted parameter was found)
+_enum_params_cache: Dict[int, Tuple[float, Dict[str, ParamValue], bool]] = {}
+
+
+def _parse_value(match: "re.Match[str]") -> ParamValue:
+    """Convert a _VALUE_RE match to the matching Python type."""
+    if match.group("f") is not None:
+        return float(match.group("f"))
+    if match.group("i") is not None:
+        return int(match.group("i"))
+    if match.group("b") is not None:
+        return match.group("b") == "true"
+    return match.group("s")
+
+
+def _parse_props(lines: Iterable[str], stop_at: Optional[str] = None) -> Tuple[Dict[str, ParamValue], bool]:
+    """
+    Parse name/value pairs from pw-cli enum-params Props output line by line.
+    
+    Args:
+        lines: The output lines, e.g. a pipe to a running pw-cli
+        stop_at: Stop reading as soon as this parameter has been parsed
+    
+    Returns:
+        The parameters read so far and True if the output was consumed
+        completely, False if parsing stopped early at stop_at
+    """
+    params: Dict[str, ParamValue] = {}
+    name = None
+    for line in lines:
+        if name is not None:
+            match = _VALUE_RE.match(line)
+            if match is not None:
+                params.setdefault(name, _parse_value(match))
+                if name == stop_at:
+                    return params, False
+                name = None
+                continue
+        header = _PARAM_HDR_RE.match(line)
+        name = header.group("name") if header is not None else None
+    return params, True
+
+
+def _get_node_params(node_id: int, wanted: Optional[str] = None) -> Optional[Dict[str, ParamValue]]:
+    """
+    Get the Props parameters of a node, reusing a recent pw-cli result.
+    
+    pw-cli output is parsed while it streams in. If wanted is given, pw-cli
+    is stopped as soon as that parameter has been read, so the returned
+    dict may not contain parameters listed after it.
+    
+    Returns None if pw-cli fails.
+    """
+    cached = _enum_params_cache.get(node_id)
+    if cached is not None and time.monotonic() - cached[0] < _PARAM_CACHE_TTL:
+        if cached[2] or wanted in cached[1]:
+            return cached[1]
+    
+    # Run pw-cli enum-params and parse its output as it arrives
+    proc = subprocess.Popen(
+        ["pw-cli", "enum-params", str(node_id), "Props"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1
+    )
+    timer = threading.Timer(_PW_CLI_TIMEOUT, proc.kill)
+    timer.start()
+    try:
+        params, complete = _parse_props(proc.stdout, stop_at=wanted)
+        if not complete:
+            proc.terminate()
+        stderr = proc.stderr.read() if complete else ""
+        proc.wait()
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+        proc.stderr.close()
+    
+    if complete and proc.returncode != 0:
+        if proc.returncode == -signal.SIGKILL:
+            raise subprocess.TimeoutExpired(proc.args, _PW_CLI_TIMEOUT)
+        print(f"pw-cli failed: {stderr}")
+        return None
+    
+    _enum_params_cache[node_id] = (time.monotonic(), params, complete)
+    return params
+
+
+def invalidate_param_cache(node_id: Optional[int] = None) -> None:
+    """
+    Drop cached pw-cli results.
+    
+    Args:
+        node_id: The node to invalidate, or None to clear the whole cache
+    """
+    if node_id is None:
+        _enum_params_cache.clear()
+    else:
+        _enum_params_cache.pop(node_id, None)
+
+
+def get_pipewire_param(node_id: int, param_name: str) -> Optional[ParamValue]:
     """
     Get a parameter value directly from PipeWire using pw-cli.
     
+    pw-cli is stopped as soon as the parameter has been read, and results
+    are cached for a short time, so looking up several parameters of the
+    same node usually runs pw-cli only once.
+    
     Args:
         node_id: The PipeWire node ID
         param_name: The full parameter name (e.g., "riaa:Gain (dB)")
@@ -16,49 +171,10 @@ def get_pipewire_param(node_id: int, param_name: str) -> Optional[Union[float, i
         The parameter value (float, int, bool, or str) or None if not found
     """
     try:
-        # Run pw-cli enum-params to get all parameters
-        result = subprocess.run(
-            ["pw-cli", "enum-params", str(node_id), "Props"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode != 0:
-            print(f"pw-cli failed: {result.stderr}")
+        params = _get_node_params(node_id, wanted=param_name)
+        if params is None:
             return None
-        
-        output = result.stdout
-        lines = output.split('\n')
-        
-        # Look for the parameter name followed by its value
-        for i, line in enumerate(lines):
-            if f'String "{param_name}"' in line:
-                # The value should be on the next line
-                if i + 1 < len(lines):
-                    value_line = lines[i + 1].strip()
-                    
-                    # Parse Float value
-                    float_match = re.match(r'Float\s+([-+]?[0-9]*\.?[0-9]+)', value_line)
-                    if float_match:
-                        return float(float_match.group(1))
-                    
-                    # Parse Int value
-                    int_match = re.match(r'Int\s+([-+]?[0-9]+)', value_line)
-                    if int_match:
-                        return int(int_match.group(1))
-                    
-                    # Parse Bool value
-                    bool_match = re.match(r'Bool\s+(true|false)', value_line)
-                    if bool_match:
-                        return bool_match.group(1) == 'true'
-                    
-                    # Parse String value
-                    string_match = re.match(r'String\s+"(.+)"', value_line)
-                    if string_match:
-                        return string_match.group(1)
-        
-        return None
+        return params.get(param_name)
         
     except subprocess.TimeoutExpired:
         print(f"Timeout getting parameter {param_name} from node {node_id}")
@@ -68,6 +184,62 @@ def get_pipewire_param(node_id: int, param_name: str) -> Optional[Union[float, i
         return None
 
 
+def _param_matches(actual_value: Optional[ParamValue], expected_value: ParamValue, tolerance: float) -> bool:
+    """Compare a PipeWire value with the expected one, using a tolerance for floats."""
+    if isinstance(expected_value, float) and isinstance(actual_value, float):
+        return abs(actual_value - expected_value) <= tolerance
+    return actual_value == expected_value
+
+
+def _fetch_params(node_id: int, wanted: Optional[str] = None) -> Dict[str, ParamValue]:
+    """Like _get_node_params, but report pw-cli errors and return an empty dict."""
+    try:
+        return _get_node_params(node_id, wanted=wanted) or {}
+    except subprocess.TimeoutExpired:
+        print(f"Timeout getting parameters from node {node_id}")
+    except Exception as e:
+        print(f"Error getting parameters from node {node_id}: {e}")
+    return {}
+
+
+def verify_params_set(node_id: int, expected: Dict[str, ParamValue], tolerance: float = 0.01) -> Dict[str, bool]:
+    """
+    Verify several parameters of one node with a single pw-cli call.
+    
+    Cached pw-cli results are never used here: they may predate the
+    change being verified, and a stale value equal to the expected one
+    would hide a change that was not applied.
+    
+    Args:
+        node_id: The PipeWire node ID
+        expected: Mapping of full parameter names to their expected values
+        tolerance: For float values, the acceptable difference
+    
+    Returns:
+        Mapping of each parameter name to True if it matches the expected value
+    """
+    # A single lookup can stop reading pw-cli output once the value is found
+    wanted = next(iter(expected)) if len(expected) == 1 else None
+    invalidate_param_cache(node_id)
+    params = _fetch_params(node_id, wanted)
+    
+    results: Dict[str, bool] = {}
+    for name, expected_value in expected.items():
+        actual_value = params.get(name)
+        if actual_value is None:
+            print(f"Parameter {name} not found in PipeWire")
+            results[name] = False
+            continue
+        match = _param_matches(actual_value, expected_value, tolerance)
+        if not match:
+            if isinstance(expected_value, float) and isinstance(actual_value, float):
+                print(f"Parameter {name}: expected {expected_value}, got {actual_value} (tolerance: {tolerance})")
+            else:
+                print(f"Parameter {name}: expected {expected_value}, got {actual_value}")
+        results[name] = match
+    return results
+
+
 def verify_param_set(node_id: int, param_name: str, expected_value: Union[float, int, bool, str], tolerance: float = 0.01) -> bool:
     """
     Verify that a parameter was actually set in PipeWire.
@@ -81,22 +253,7 @@ def verify_param_set(node_id: int, param_name: str, expected_value: Union[float,
     Returns:
         True if the parameter matches the expected value
     """
-    actual_value = get_pipewire_param(node_id, param_name)
-    
-    if actual_value is None:
-        print(f"Parameter {param_name} not found in PipeWire")
-        return False
-    
-    if isinstance(expected_value, float) and isinstance(actual_value, float):
-        match = abs(actual_value - expected_value) <= tolerance
-        if not match:
-            print(f"Parameter {param_name}: expected {expected_value}, got {actual_value} (tolerance: {tolerance})")
-        return match
-    else:
-        match = actual_value == expected_value
-        if not match:
-            print(f"Parameter {param_name}: expected {expected_value}, got {actual_value}")
-        return match
+    return verify_params_set(node_id, {param_name: expected_value}, tolerance)[param_name]
 
 
 def set_pipewire_param(node_id: int, param_name: str, value: Union[float, int, bool, str]) -> bool:
@@ -133,6 +290,7 @@ def set_pipewire_param(node_id: int, param_name: str, value: Union[float, int, b
             print(f"pw-cli set-param failed: {result.stderr}")
             return False
         
+        invalidate_param_cache(node_id)
         return True
         
     except subprocess.TimeoutExpired:
@@ -141,3 +299,181 @@ def set_pipewire_param(node_id: int, param_name: str, value: Union[float, int, b
     except Exception as e:
         print(f"Error setting parameter {param_name}: {e}")
         return False
+
+
+def find_speakereq_node() -> Tuple[Optional[int], Optional[str]]:
+    """
+    Find any speakereq node (speakereqNxM) dynamically.
+    
+    Returns:
+        Tuple (node_id, node_name) or (None, None) if not found
+    """
+    try:
+        result = subprocess.run(
+            ["pw-cli", "list-objects"],
+            capture_output=True,
+            encoding="ascii",  # pw-cli output is ASCII
+            errors="replace",
+            timeout=5
+        )
+        
+        match = _SPEAKEREQ_NODE_RE.search(result.stdout)
+        if match:
+            return int(match.group("id")), match.group("name")
+        return None, None
+    except Exception as e:
+        print(f"Error finding speakereq node: {e}")
+        return None, None
+
+
+def _pw_props_dump(node_id: int) -> Optional[str]:
+    """Return the pw-cli enum-params Props output of a node, or None on error."""
+    try:
+        result = subprocess.run(
+            ["pw-cli", "enum-params", str(node_id), "Props"],
+            capture_output=True,
+            encoding="ascii",  # pw-cli output is ASCII
+            errors="replace",
+            timeout=5
+        )
+    except Exception as e:
+        print(f"Error reading PipeWire parameters: {e}")
+        return None
+    return result.stdout
+
+
+@functools.lru_cache(maxsize=None)
+def _param_regex(node_name: str, param_name: str) -> "re.Pattern[str]":
+    """Compiled pattern matching one prefixed parameter and its value line."""
+    return re.compile(
+        rf'String "{re.escape(node_name + ":" + param_name)}"[ \t]*\n[ \t]*\S+[ \t]+(?P<value>[^\n]*?)[ \t]*$',
+        re.MULTILINE
+    )
+
+
+def iter_pw_params(node_id: int, node_name: str) -> Iterator[Tuple[str, str]]:
+    """
+    Run pw-cli enum-params once and yield every parameter of a node.
+    
+    Args:
+        node_id: The PipeWire node ID
+        node_name: The node name used as parameter prefix (e.g., "speakereq2x2")
+    
+    Yields:
+        (name, value) with the name stripped of its "<node_name>:" prefix and
+        the value as the raw string printed by pw-cli
+    """
+    output = _pw_props_dump(node_id)
+    if output is None:
+        return
+    
+    for match in _PREFIXED_PARAM_RE.finditer(output):
+        if match.group("node") == node_name:
+            yield match.group("name"), match.group("value")
+
+
+def get_pw_params(node_id: int, node_name: str, *names: str) -> Dict[str, Optional[str]]:
+    """
+    Read several parameters of a node with a single pw-cli call.
+    
+    Args:
+        node_id: The PipeWire node ID
+        node_name: The node name used as parameter prefix (e.g., "speakereq2x2")
+        names: Parameter names without prefix; all parameters if none are given
+    
+    Returns:
+        Mapping of each name to its raw value string, or None if not found
+    """
+    params: Dict[str, Optional[str]] = {}
+    for name, value in iter_pw_params(node_id, node_name):
+        params.setdefault(name, value)
+    if not names:
+        return params
+    return {name: params.get(name) for name in names}
+
+
+def get_pw_param(param_name: str, node_id: int, node_name: str) -> Optional[str]:
+    """
+    Read a parameter value directly from PipeWire using pw-cli.
+    
+    Args:
+        param_name: The parameter name without prefix (e.g., "master_gain_db")
+        node_id: The PipeWire node ID
+        node_name: The node name used as parameter prefix (e.g., "speakereq2x2")
+    
+    Returns:
+        The raw value string, or None if not found
+    """
+    output = _pw_props_dump(node_id)
+    if output is None:
+        return None
+    match = _param_regex(node_name, param_name).search(output)
+    return match.group("value") if match else None
+
+
+def wait_until(fn: Callable[[], object], timeout: float = 1.0, interval: float = 0.005) -> bool:
+    """
+    Poll fn until it returns a truthy value.
+    
+    Used instead of fixed sleeps after changing something through the API:
+    changes usually show up within a few milliseconds.
+    
+    Args:
+        fn: The condition to check
+        timeout: Maximum time to wait in seconds
+        interval: Delay between checks in seconds
+    
+    Returns:
+        True if fn returned a truthy value before the timeout
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if fn():
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+
+def wait_for_value(fetch: Callable[[], Any], predicate: Callable[[Any], bool],
+                   timeout: float = 1.0, interval: float = 0.005) -> Tuple[bool, Any]:
+    """
+    Poll fetch until predicate holds for the value it returns.
+    
+    Like wait_until, but also returns the last fetched value, so the caller
+    can check further fields without fetching it again.
+    
+    Returns:
+        (whether predicate held before the timeout, last fetched value)
+    """
+    last = None
+    
+    def check():
+        nonlocal last
+        last = fetch()
+        return predicate(last)
+    
+    return wait_until(check, timeout=timeout, interval=interval), last
+
+
+# path -> ((st_ino, st_mtime_ns, st_size), parsed JSON) of the last load_settings call
+_settings_cache: Dict[str, Tuple[Tuple[int, int, int], Any]] = {}
+
+
+def load_settings(path: str) -> Any:
+    """
+    Parse a settings JSON file, reusing the previous result while the file is unchanged.
+    
+    The file counts as unchanged while its inode, mtime and size are the same.
+    Callers must not modify the returned object, it may be shared.
+    """
+    st = os.stat(path)
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    cached = _settings_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, 'rb') as f:
+        data = f.read()
+    settings = orjson.loads(data) if orjson is not None else json.loads(data)
+    _settings_cache[path] = (key, settings)
+    return settings
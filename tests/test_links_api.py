@@ -6,37 +6,54 @@ All verification is done through the API itself, making these tests suitable
 for both local and remote testing.
 """
 
-import time
+import json
+import os
+import re
 import pytest
-import requests
 
+from pipewire_utils import wait_until
 
-# Note: test_env fixture is provided by conftest.py (session-scoped)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _worker_partition():
+    """
+    (index, count) of this pytest-xdist worker, or (0, 1) without xdist.
+    Link tests on different workers pick output ports from disjoint
+    partitions, so they never create or remove the same link.
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    count = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", "1"))
+    return int(worker[2:]), count
+
+
+# Note: test_env and http fixtures are provided by conftest.py (session-scoped)
 
 
 class TestListLinks:
     """Tests for GET /api/v1/links"""
     
-    def test_list_links_returns_200(self, test_env):
+    def test_list_links_returns_200(self, test_env, http):
         """Test that /api/v1/links returns 200 OK"""
-        response = requests.get(f"{test_env.base_url}/api/v1/links")
+        response = http.get(test_env.urls.links)
         assert response.status_code == 200
     
-    def test_list_links_returns_json(self, test_env):
+    def test_list_links_returns_json(self, test_env, http):
         """Test that /api/v1/links returns JSON"""
-        response = requests.get(f"{test_env.base_url}/api/v1/links")
+        response = http.get(test_env.urls.links)
         assert "application/json" in response.headers.get("Content-Type", "")
     
-    def test_list_links_has_links_array(self, test_env):
+    def test_list_links_has_links_array(self, test_env, http):
         """Test that response has links array"""
-        response = requests.get(f"{test_env.base_url}/api/v1/links")
+        response = http.get(test_env.urls.links)
         data = response.json()
         assert "links" in data
         assert isinstance(data["links"], list)
     
-    def test_list_links_structure(self, test_env):
+    def test_list_links_structure(self, test_env, http):
         """Test that links have correct structure"""
-        response = requests.get(f"{test_env.base_url}/api/v1/links")
+        response = http.get(test_env.urls.links)
         data = response.json()
         
         if data["links"]:  # Only test if there are links
@@ -51,19 +68,19 @@ class TestListLinks:
 class TestListPorts:
     """Tests for ports listing endpoints"""
     
-    def test_list_output_ports_returns_200(self, test_env):
+    def test_list_output_ports_returns_200(self, test_env, http):
         """Test that /api/v1/links/ports/output returns 200 OK"""
-        response = requests.get(f"{test_env.base_url}/api/v1/links/ports/output")
+        response = http.get(test_env.urls.ports_output)
         assert response.status_code == 200
     
-    def test_list_input_ports_returns_200(self, test_env):
+    def test_list_input_ports_returns_200(self, test_env, http):
         """Test that /api/v1/links/ports/input returns 200 OK"""
-        response = requests.get(f"{test_env.base_url}/api/v1/links/ports/input")
+        response = http.get(test_env.urls.ports_input)
         assert response.status_code == 200
     
-    def test_output_ports_have_structure(self, test_env):
+    def test_output_ports_have_structure(self, test_env, http):
         """Test that output ports have correct structure"""
-        response = requests.get(f"{test_env.base_url}/api/v1/links/ports/output")
+        response = http.get(test_env.urls.ports_output)
         data = response.json()
         
         assert "ports" in data
@@ -74,9 +91,9 @@ class TestListPorts:
             assert "node_name" in port
             assert "port_name" in port
     
-    def test_input_ports_have_structure(self, test_env):
+    def test_input_ports_have_structure(self, test_env, http):
         """Test that input ports have correct structure"""
-        response = requests.get(f"{test_env.base_url}/api/v1/links/ports/input")
+        response = http.get(test_env.urls.ports_input)
         data = response.json()
         
         assert "ports" in data
@@ -88,111 +105,199 @@ class TestListPorts:
             assert "port_name" in port
 
 
-class TestCreateAndRemoveLink:
-    """Tests for creating and removing links"""
+def wait_for_link_exists(test_env, http, output_name, input_name, expected, timeout=2.0):
+    """
+    Poll /api/v1/links/exists until it reports the expected state.
     
-    def find_linkable_ports(self, test_env):
-        """Find an output and input port that can be linked for testing.
-        
-        Filters out:
-        - Ports from the same node (can't self-link)
-        - Already linked pairs
-        - Monitor ports (output only)
-        - MIDI ports (incompatible with audio)
-        
-        Returns a pair of compatible audio ports or (None, None) if none found.
-        """
-        # Get output ports
-        out_response = requests.get(f"{test_env.base_url}/api/v1/links/ports/output")
-        output_ports = out_response.json()["ports"]
-        
-        # Get input ports
-        in_response = requests.get(f"{test_env.base_url}/api/v1/links/ports/input")
-        input_ports = in_response.json()["ports"]
-        
-        # Get existing links to avoid conflicts
-        links_response = requests.get(f"{test_env.base_url}/api/v1/links")
-        existing_links = links_response.json()["links"]
-        existing_pairs = {(l["output_port_name"], l["input_port_name"]) for l in existing_links}
-        
-        def is_midi_port(port):
-            """Check if a port is a MIDI port (incompatible with audio)."""
-            name = port["name"].lower()
-            return "midi" in name or "bluez_midi" in name
-        
-        def is_audio_port(port):
-            """Check if a port is an audio port (has channel indicators)."""
-            name = port["port_name"].lower()
-            # Common audio channel names
-            return any(ch in name for ch in ["_fl", "_fr", "_fc", "_lfe", "_rl", "_rr", 
-                                              "playback", "capture", "output", "input"])
-        
-        # Find a pair that's not already linked
-        # Prefer ports from different nodes and matching channels (FL to FL, etc.)
-        for out_port in output_ports:
-            # Skip monitor ports
-            if "monitor" in out_port["name"].lower():
-                continue
-            # Skip MIDI ports
-            if is_midi_port(out_port):
-                continue
-            # Prefer audio ports
-            if not is_audio_port(out_port):
-                continue
-                
-            for in_port in input_ports:
+    Returns:
+        The last response data; its "exists" differs from expected on timeout
+    """
+    last = {}
+    
+    def check():
+        response = http.get(
+            test_env.urls.links_exists,
+            params={"output": output_name, "input": input_name}
+        )
+        last.clear()
+        last.update(response.json())
+        return last["exists"] == expected
+    
+    wait_until(check, timeout=timeout, interval=0.01)
+    return last
+
+
+# Port classification, case-insensitive substring matches
+_MIDI_RE = re.compile(r"midi", re.IGNORECASE)
+_MONITOR_RE = re.compile(r"monitor", re.IGNORECASE)
+# Common audio channel names
+_AUDIO_RE = re.compile(r"_fl|_fr|_fc|_lfe|_rl|_rr|playback|capture|output|input", re.IGNORECASE)
+
+
+def is_midi_port(port):
+    """Check if a port is a MIDI port (incompatible with audio)."""
+    return _MIDI_RE.search(port["name"]) is not None
+
+
+def is_audio_port(port):
+    """Check if a port is an audio port (has channel indicators)."""
+    return _AUDIO_RE.search(port["port_name"]) is not None
+
+
+def _channel_suffix(port):
+    """Lowercase channel part of a port name, e.g. "fl" for "playback_FL"."""
+    return port["port_name"].lower().rsplit("_", 1)[-1]
+
+
+def find_linkable_ports(output_ports, input_ports, existing_pairs):
+    """Find an output and input port that can be linked for testing.
+    
+    Filters out:
+    - Ports from the same node (can't self-link)
+    - Already linked pairs
+    - Monitor ports (output only)
+    - MIDI ports (incompatible with audio)
+    - Output ports assigned to other xdist workers
+    
+    Args:
+        output_ports: Ports as returned by /api/v1/links/ports/output
+        input_ports: Ports as returned by /api/v1/links/ports/input
+        existing_pairs: Set of linked (output name, input name) pairs
+    
+    Returns a pair of compatible audio ports or (None, None) if none found.
+    """
+    # Input candidates don't depend on the output port, filter them once
+    # and index them by channel suffix (e.g. "fl" of "playback_FL")
+    audio_inputs = [p for p in input_ports if not is_midi_port(p) and is_audio_port(p)]
+    inputs_by_suffix = {}
+    for in_port in audio_inputs:
+        inputs_by_suffix.setdefault(_channel_suffix(in_port), []).append(in_port)
+    
+    worker_index, worker_count = _worker_partition()
+    
+    # Find a pair that's not already linked
+    # Prefer ports from different nodes and matching channels (FL to FL, etc.)
+    for out_port in output_ports:
+        # Leave ports of other xdist workers alone
+        if out_port["id"] % worker_count != worker_index:
+            continue
+        # Skip monitor ports
+        if _MONITOR_RE.search(out_port["name"]):
+            continue
+        # Skip MIDI ports
+        if is_midi_port(out_port):
+            continue
+        # Prefer audio ports
+        if not is_audio_port(out_port):
+            continue
+            
+        # Try inputs with the same channel first, then any audio input
+        same_channel = inputs_by_suffix.get(_channel_suffix(out_port), [])
+        for candidates in (same_channel, audio_inputs):
+            for in_port in candidates:
                 # Skip if same node
                 if out_port["node_name"] == in_port["node_name"]:
                     continue
                 # Skip if already linked
                 if (out_port["name"], in_port["name"]) in existing_pairs:
                     continue
-                # Skip MIDI ports
-                if is_midi_port(in_port):
-                    continue
-                # Prefer audio ports
-                if not is_audio_port(in_port):
-                    continue
                 return out_port, in_port
-        
-        return None, None
     
-    def test_create_link_by_name(self, test_env):
-        """Test creating a link by port name and verify with pw-link"""
-        output_port, input_port = self.find_linkable_ports(test_env)
-        
-        if output_port is None:
-            pytest.skip("No suitable ports found for linking test")
-        
-        output_name = output_port["name"]
-        input_name = input_port["name"]
-        
-        # Create the link
-        response = requests.post(
-            f"{test_env.base_url}/api/v1/links",
-            json={"output": output_name, "input": input_name}
-        )
-        assert response.status_code == 200, f"Failed to create link: {response.text}"
-        
-        data = response.json()
-        assert data["status"] == "ok"
+    return None, None
+
+
+@pytest.fixture(scope="class")
+def link_graph(test_env, http):
+    """
+    (output ports, input ports, existing links) of the server, fetched
+    once per test class.
+    """
+    output_ports = http.get(test_env.urls.ports_output).json()["ports"]
+    input_ports = http.get(test_env.urls.ports_input).json()["ports"]
+    existing_links = http.get(test_env.urls.links).json()["links"]
+    return output_ports, input_ports, existing_links
+
+
+@pytest.fixture(scope="class")
+def existing_pairs(link_graph):
+    """Set of (output port name, input port name) linked before the tests ran"""
+    _, _, existing_links = link_graph
+    return {(l["output_port_name"], l["input_port_name"]) for l in existing_links}
+
+
+@pytest.fixture(scope="class")
+def linkable_ports(link_graph, existing_pairs):
+    """
+    Output and input port to link in the tests, or (None, None).
+    Picked once per test class; every test removes the link it creates,
+    so the pair stays linkable for the next test.
+    """
+    output_ports, input_ports, _ = link_graph
+    return find_linkable_ports(output_ports, input_ports, existing_pairs)
+
+
+@pytest.fixture(scope="class")
+def link_payload(linkable_ports):
+    """
+    JSON body naming the linkable ports, as used to create or remove the
+    link by name; serialized once per test class. None without ports.
+    """
+    output_port, input_port = linkable_ports
+    if output_port is None:
+        return None
+    return json.dumps({"output": output_port["name"], "input": input_port["name"]}).encode()
+
+
+@pytest.fixture
+def created_link(test_env, http, linkable_ports, link_payload):
+    """
+    Link between the linkable ports, created by port name for one test.
+    Yields a dict with the "output" and "input" port names and the create
+    "response" data; the link is removed afterwards unless the test did.
+    """
+    output_port, input_port = linkable_ports
+    if output_port is None:
+        pytest.skip("No suitable ports found for linking test")
+    
+    output_name = output_port["name"]
+    input_name = input_port["name"]
+    
+    response = http.post(
+        test_env.urls.links,
+        data=link_payload,
+        headers=_JSON_HEADERS
+    )
+    assert response.status_code == 200, f"Failed to create link: {response.text}"
+    
+    yield {"output": output_name, "input": input_name, "response": response.json()}
+    
+    # Clean up - remove the link if it is still there
+    exists = http.get(
+        test_env.urls.links_exists,
+        params={"output": output_name, "input": input_name}
+    ).json()
+    if exists["exists"] and exists.get("link_id"):
+        http.delete(f"{test_env.base_url}/api/v1/links/{exists['link_id']}")
+
+
+class TestCreateAndRemoveLink:
+    """Tests for creating and removing links"""
+    
+    def test_create_link_by_name(self, test_env, http, created_link):
+        """Test creating a link by port name and verify it via the API"""
+        assert created_link["response"]["status"] == "ok"
         
         # Verify link exists via API
-        exists_response = requests.get(
-            f"{test_env.base_url}/api/v1/links/exists",
-            params={"output": output_name, "input": input_name}
+        exists_response = http.get(
+            test_env.urls.links_exists,
+            params={"output": created_link["output"], "input": created_link["input"]}
         )
         assert exists_response.status_code == 200
         assert exists_response.json()["exists"] == True
-        
-        # Clean up - remove the link
-        link_id = exists_response.json().get("link_id")
-        if link_id:
-            requests.delete(f"{test_env.base_url}/api/v1/links/{link_id}")
     
-    def test_create_and_remove_link_by_id(self, test_env):
+    def test_create_and_remove_link_by_id(self, test_env, http, linkable_ports):
         """Test creating a link by port ID and removing by link ID"""
-        output_port, input_port = self.find_linkable_ports(test_env)
+        output_port, input_port = linkable_ports
         
         if output_port is None:
             pytest.skip("No suitable ports found for linking test")
@@ -203,82 +308,57 @@ class TestCreateAndRemoveLink:
         input_name = input_port["name"]
         
         # Create the link using IDs
-        response = requests.post(
-            f"{test_env.base_url}/api/v1/links",
+        response = http.post(
+            test_env.urls.links,
             json={"output": str(output_id), "input": str(input_id)}
         )
         assert response.status_code == 200, f"Failed to create link: {response.text}"
         
         # Verify link exists via API
-        time.sleep(0.1)  # Give PipeWire a moment to create the link
-        exists_response = requests.get(
-            f"{test_env.base_url}/api/v1/links/exists",
-            params={"output": output_name, "input": input_name}
-        )
-        assert exists_response.json()["exists"] == True, \
+        exists = wait_for_link_exists(test_env, http, output_name, input_name, True)
+        assert exists["exists"] == True, \
             f"Link {output_name} -> {input_name} not found via API after creation"
         
-        # Get the link ID
-        link_id = exists_response.json().get("link_id")
+        # Get the link ID, returned by the create call
+        link_id = response.json().get("link_id")
+        if link_id is None:
+            link_id = exists.get("link_id")
         assert link_id is not None, "Link ID not returned"
         
         # Remove the link by ID
-        remove_response = requests.delete(f"{test_env.base_url}/api/v1/links/{link_id}")
+        remove_response = http.delete(f"{test_env.base_url}/api/v1/links/{link_id}")
         assert remove_response.status_code == 200, f"Failed to remove link: {remove_response.text}"
         
         # Verify link is gone via API
-        time.sleep(0.1)  # Give PipeWire a moment
-        exists_response = requests.get(
-            f"{test_env.base_url}/api/v1/links/exists",
-            params={"output": output_name, "input": input_name}
-        )
-        assert exists_response.json()["exists"] == False, \
+        exists = wait_for_link_exists(test_env, http, output_name, input_name, False)
+        assert exists["exists"] == False, \
             f"Link {output_name} -> {input_name} still exists via API after removal"
     
-    def test_remove_link_by_name(self, test_env):
+    def test_remove_link_by_name(self, test_env, http, created_link, link_payload):
         """Test creating and removing a link using port names"""
-        output_port, input_port = self.find_linkable_ports(test_env)
-        
-        if output_port is None:
-            pytest.skip("No suitable ports found for linking test")
-        
-        output_name = output_port["name"]
-        input_name = input_port["name"]
-        
-        # Create the link
-        response = requests.post(
-            f"{test_env.base_url}/api/v1/links",
-            json={"output": output_name, "input": input_name}
-        )
-        assert response.status_code == 200
+        output_name = created_link["output"]
+        input_name = created_link["input"]
         
         # Verify link exists via API
-        time.sleep(0.1)
-        exists_response = requests.get(
-            f"{test_env.base_url}/api/v1/links/exists",
-            params={"output": output_name, "input": input_name}
-        )
-        assert exists_response.json()["exists"] == True
+        exists = wait_for_link_exists(test_env, http, output_name, input_name, True)
+        assert exists["exists"] == True
         
         # Remove the link by name
-        remove_response = requests.delete(
-            f"{test_env.base_url}/api/v1/links/by-name",
-            json={"output": output_name, "input": input_name}
+        remove_response = http.delete(
+            test_env.urls.links_by_name,
+            data=link_payload,
+            headers=_JSON_HEADERS
         )
         assert remove_response.status_code == 200
         
         # Verify link is gone via API
-        time.sleep(0.1)
-        exists_response = requests.get(
-            f"{test_env.base_url}/api/v1/links/exists",
-            params={"output": output_name, "input": input_name}
-        )
-        assert exists_response.json()["exists"] == False, \
+        exists = wait_for_link_exists(test_env, http, output_name, input_name, False)
+        assert exists["exists"] == False, \
             f"Link still exists after removal by name"
     
-    def test_link_round_trip(self, test_env):
+    def test_link_round_trip(self, test_env, http, linkable_ports, link_payload):
         """Full round trip: create link, verify in API, remove, verify gone"""
-        output_port, input_port = self.find_linkable_ports(test_env)
+        output_port, input_port = linkable_ports
         
         if output_port is None:
             pytest.skip("No suitable ports found for linking test")
@@ -287,42 +367,45 @@ class TestCreateAndRemoveLink:
         input_name = input_port["name"]
         
         # 1. Verify link doesn't exist initially via API
-        initial_response = requests.get(
-            f"{test_env.base_url}/api/v1/links/exists",
+        initial_response = http.get(
+            test_env.urls.links_exists,
             params={"output": output_name, "input": input_name}
         )
         if initial_response.json()["exists"]:
             pytest.skip(f"Link {output_name} -> {input_name} already exists")
         
         # 2. Create the link via API
-        create_response = requests.post(
-            f"{test_env.base_url}/api/v1/links",
-            json={"output": output_name, "input": input_name}
+        create_response = http.post(
+            test_env.urls.links,
+            data=link_payload,
+            headers=_JSON_HEADERS
         )
         assert create_response.status_code == 200
         
         # 3. Verify link exists in API
-        exists_response = requests.get(
-            f"{test_env.base_url}/api/v1/links/exists",
+        exists_response = http.get(
+            test_env.urls.links_exists,
             params={"output": output_name, "input": input_name}
         )
         assert exists_response.json()["exists"] == True
-        link_id = exists_response.json()["link_id"]
+        link_id = create_response.json().get("link_id")
+        if link_id is None:
+            link_id = exists_response.json()["link_id"]
         
         # 4. Verify link appears in list
-        list_response = requests.get(f"{test_env.base_url}/api/v1/links")
+        list_response = http.get(test_env.urls.links)
         links = list_response.json()["links"]
         found = any(l["output_port_name"] == output_name and l["input_port_name"] == input_name 
                    for l in links)
         assert found, "Link not found in links list"
         
         # 5. Remove the link
-        remove_response = requests.delete(f"{test_env.base_url}/api/v1/links/{link_id}")
+        remove_response = http.delete(f"{test_env.base_url}/api/v1/links/{link_id}")
         assert remove_response.status_code == 200
         
         # 6. Verify link gone from API
-        exists_response = requests.get(
-            f"{test_env.base_url}/api/v1/links/exists",
+        exists_response = http.get(
+            test_env.urls.links_exists,
             params={"output": output_name, "input": input_name}
         )
         assert exists_response.json()["exists"] == False
@@ -331,28 +414,28 @@ class TestCreateAndRemoveLink:
 class TestLinkExists:
     """Tests for the link exists endpoint"""
     
-    def test_check_link_exists_returns_200(self, test_env):
+    def test_check_link_exists_returns_200(self, test_env, http):
         """Test that /api/v1/links/exists returns 200 OK"""
-        response = requests.get(
-            f"{test_env.base_url}/api/v1/links/exists",
+        response = http.get(
+            test_env.urls.links_exists,
             params={"output": "dummy:port", "input": "other:port"}
         )
         assert response.status_code == 200
     
-    def test_check_link_exists_structure(self, test_env):
+    def test_check_link_exists_structure(self, test_env, http):
         """Test that response has correct structure"""
-        response = requests.get(
-            f"{test_env.base_url}/api/v1/links/exists",
+        response = http.get(
+            test_env.urls.links_exists,
             params={"output": "dummy:port", "input": "other:port"}
         )
         data = response.json()
         assert "exists" in data
         assert isinstance(data["exists"], bool)
     
-    def test_nonexistent_link_returns_false(self, test_env):
+    def test_nonexistent_link_returns_false(self, test_env, http):
         """Test that checking a non-existent link returns false"""
-        response = requests.get(
-            f"{test_env.base_url}/api/v1/links/exists",
+        response = http.get(
+            test_env.urls.links_exists,
             params={"output": "nonexistent:port_FL", "input": "also_nonexistent:port_FL"}
         )
         data = response.json()
@@ -6,228 +6,124 @@ properly formatted JSON responses.
 """
 
 import pytest
-import requests
 import subprocess
 
+from http_utils import jload
 
-# Note: test_env fixture is provided by conftest.py (session-scoped)
 
+# Note: test_env and http fixtures are provided by conftest.py (session-scoped)
 
+REQUIRED_FIELDS = frozenset({"id", "name", "type"})
+
+
+def check_object(obj):
+    """Check the fields and field types of one listed object in a single pass"""
+    missing = REQUIRED_FIELDS - obj.keys()
+    assert not missing, f"Object missing fields: {sorted(missing)}"
+    assert isinstance(obj["id"], int) and type(obj["id"]) is not bool, \
+        f"ID should be int, got {type(obj['id'])}"
+    assert obj["id"] >= 0, f"Negative ID found: {obj['id']}"
+    assert isinstance(obj["name"], str), f"Name should be str, got {type(obj['name'])}"
+    assert isinstance(obj["type"], str), f"Type should be str, got {type(obj['type'])}"
+
+
+@pytest.fixture(scope="module")
+def ls_data(test_env, http):
+    """
+    Parsed /api/v1/ls response, fetched once for the tests that only
+    inspect the listing. Status and header checks still make their own call.
+    """
+    response = http.get(test_env.urls.ls)
+    assert response.status_code == 200
+    return jload(response)
+
+
+@pytest.mark.usefixtures("ls_data")
 class TestListAll:
     """Tests for GET /api/v1/ls"""
     
-    def test_list_all_returns_200(self, test_env):
+    def test_list_all_returns_200(self, test_env, http):
         """Test that /api/v1/ls returns 200 OK"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
+        response = http.get(test_env.urls.ls)
         assert response.status_code == 200
     
-    def test_list_all_returns_json(self, test_env):
+    def test_list_all_returns_json(self, ls_data):
         """Test that /api/v1/ls returns valid JSON"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         assert isinstance(data, dict)
     
-    def test_list_all_has_objects_array(self, test_env):
+    def test_list_all_has_objects_array(self, ls_data):
         """Test that response has 'objects' array"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         assert "objects" in data
         assert isinstance(data["objects"], list)
     
-    def test_list_all_objects_have_required_fields(self, test_env):
-        """Test that each object has id, name, and type fields"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+    def test_list_all_objects_have_required_fields(self, ls_data):
+        """Test that each object has well-typed id, name, and type fields"""
+        data = ls_data
         
         for obj in data["objects"]:
-            assert "id" in obj, "Object missing 'id' field"
-            assert "name" in obj, "Object missing 'name' field"
-            assert "type" in obj, "Object missing 'type' field"
+            check_object(obj)
     
-    def test_list_all_id_is_integer(self, test_env):
+    def test_list_all_id_is_integer(self, ls_data):
         """Test that object IDs are integers"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         
         for obj in data["objects"]:
             assert isinstance(obj["id"], int), f"ID should be int, got {type(obj['id'])}"
     
-    def test_list_all_has_multiple_types(self, test_env):
+    def test_list_all_has_multiple_types(self, ls_data):
         """Test that the listing includes multiple object types"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         
         types = set(obj["type"] for obj in data["objects"])
         # Should have at least nodes and modules
         assert len(types) >= 2, f"Expected multiple types, got: {types}"
 
 
-class TestListNodes:
-    """Tests for filtering nodes from /api/v1/ls"""
-    
-    def test_list_nodes_returns_200(self, test_env):
-        """Test that /api/v1/ls returns 200 OK and contains nodes"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
+class TestListByType:
+    """Tests for filtering each object type from /api/v1/ls"""
+    
+    @pytest.mark.parametrize("obj_type, min_count", [
+        ("node", 1),
+        ("device", 0),  # May be 0 in some environments
+        ("port", 1),
+        ("module", 1),
+        ("factory", 1),
+        ("client", 1),
+        ("link", 0),
+    ])
+    def test_list_type(self, test_env, http, obj_type, min_count):
+        """Test that /api/v1/ls returns 200 OK and filtering by type only returns that type"""
+        response = http.get(test_env.urls.ls)
         assert response.status_code == 200
-        data = response.json()
-        nodes = [obj for obj in data["objects"] if obj["type"] == "node"]
-        assert len(nodes) > 0, "Expected at least one node"
-    
-    def test_list_nodes_only_returns_nodes(self, test_env):
-        """Test that filtering by type='node' only returns node objects"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = jload(response)
         
-        nodes = [obj for obj in data["objects"] if obj["type"] == "node"]
-        for obj in nodes:
-            assert obj["type"] == "node", f"Expected type 'node', got '{obj['type']}'"
+        objects = [obj for obj in data["objects"] if obj["type"] == obj_type]
+        assert len(objects) >= min_count, f"Expected at least {min_count} {obj_type}(s)"
+        for obj in objects:
+            assert obj["type"] == obj_type, f"Expected type '{obj_type}', got '{obj['type']}'"
     
-    def test_list_nodes_subset_of_all(self, test_env):
+    def test_list_nodes_subset_of_all(self, ls_data):
         """Test that nodes can be filtered from all objects"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         
         all_node_ids = {obj["id"] for obj in data["objects"] if obj["type"] == "node"}
         assert len(all_node_ids) > 0, "Expected at least one node"
-
-
-class TestListDevices:
-    """Tests for filtering devices from /api/v1/ls"""
-    
-    def test_list_devices_returns_200(self, test_env):
-        """Test that /api/v1/ls returns 200 OK and contains devices"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        assert response.status_code == 200
-        data = response.json()
-        devices = [obj for obj in data["objects"] if obj["type"] == "device"]
-        assert len(devices) >= 0  # May be 0 in some environments
-    
-    def test_list_devices_only_returns_devices(self, test_env):
-        """Test that filtering by type='device' only returns device objects"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
-        
-        devices = [obj for obj in data["objects"] if obj["type"] == "device"]
-        for obj in devices:
-            assert obj["type"] == "device", f"Expected type 'device', got '{obj['type']}'"
-
-
-class TestListPorts:
-    """Tests for filtering ports from /api/v1/ls"""
-    
-    def test_list_ports_returns_200(self, test_env):
-        """Test that /api/v1/ls returns 200 OK and contains ports"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        assert response.status_code == 200
-        data = response.json()
-        ports = [obj for obj in data["objects"] if obj["type"] == "port"]
-        assert len(ports) > 0, "Expected at least one port"
-    
-    def test_list_ports_only_returns_ports(self, test_env):
-        """Test that filtering by type='port' only returns port objects"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
-        
-        ports = [obj for obj in data["objects"] if obj["type"] == "port"]
-        for obj in ports:
-            assert obj["type"] == "port", f"Expected type 'port', got '{obj['type']}'"
-
-
-class TestListModules:
-    """Tests for filtering modules from /api/v1/ls"""
-    
-    def test_list_modules_returns_200(self, test_env):
-        """Test that /api/v1/ls returns 200 OK and contains modules"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        assert response.status_code == 200
-        data = response.json()
-        modules = [obj for obj in data["objects"] if obj["type"] == "module"]
-        assert len(modules) > 0, "Expected at least one module"
-    
-    def test_list_modules_only_returns_modules(self, test_env):
-        """Test that filtering by type='module' only returns module objects"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
-        
-        modules = [obj for obj in data["objects"] if obj["type"] == "module"]
-        for obj in modules:
-            assert obj["type"] == "module", f"Expected type 'module', got '{obj['type']}'"
     
-    def test_list_modules_has_pipewire_modules(self, test_env):
+    def test_list_modules_has_pipewire_modules(self, ls_data):
         """Test that some standard PipeWire modules are present"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         
         modules = [obj for obj in data["objects"] if obj["type"] == "module"]
         names = [obj["name"] for obj in modules]
         # Should have at least the rt module
         assert any("libpipewire-module" in name for name in names), \
             f"Expected PipeWire modules, got: {names[:5]}..."
-
-
-class TestListFactories:
-    """Tests for filtering factories from /api/v1/ls"""
-    
-    def test_list_factories_returns_200(self, test_env):
-        """Test that /api/v1/ls returns 200 OK and contains factories"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        assert response.status_code == 200
-        data = response.json()
-        factories = [obj for obj in data["objects"] if obj["type"] == "factory"]
-        assert len(factories) > 0, "Expected at least one factory"
-    
-    def test_list_factories_only_returns_factories(self, test_env):
-        """Test that filtering by type='factory' only returns factory objects"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
-        
-        factories = [obj for obj in data["objects"] if obj["type"] == "factory"]
-        for obj in factories:
-            assert obj["type"] == "factory", f"Expected type 'factory', got '{obj['type']}'"
-
-
-class TestListClients:
-    """Tests for filtering clients from /api/v1/ls"""
-    
-    def test_list_clients_returns_200(self, test_env):
-        """Test that /api/v1/ls returns 200 OK and contains clients"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        assert response.status_code == 200
-        data = response.json()
-        clients = [obj for obj in data["objects"] if obj["type"] == "client"]
-        assert len(clients) > 0, "Expected at least one client"
-    
-    def test_list_clients_only_returns_clients(self, test_env):
-        """Test that filtering by type='client' only returns client objects"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
-        
-        clients = [obj for obj in data["objects"] if obj["type"] == "client"]
-        for obj in clients:
-            assert obj["type"] == "client", f"Expected type 'client', got '{obj['type']}'"
-
-
-class TestListLinks:
-    """Tests for filtering links from /api/v1/ls"""
-    
-    def test_list_links_returns_200(self, test_env):
-        """Test that /api/v1/ls returns 200 OK"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        assert response.status_code == 200
-    
-    def test_list_links_only_returns_links(self, test_env):
-        """Test that filtering by type='link' only returns link objects"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
-        
-        links = [obj for obj in data["objects"] if obj["type"] == "link"]
-        for obj in links:
-            assert obj["type"] == "link", f"Expected type 'link', got '{obj['type']}'"
     
-    def test_list_links_name_shows_connection(self, test_env):
+    def test_list_links_name_shows_connection(self, ls_data):
         """Test that link names show connection info (node:port -> node:port)"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         
         links = [obj for obj in data["objects"] if obj["type"] == "link"]
         if links:  # Only test if there are links
@@ -237,21 +133,20 @@ class TestListLinks:
                     f"Expected link name to show connection, got: {obj['name']}"
 
 
+@pytest.mark.usefixtures("ls_data")
 class TestObjectIdUniqueness:
     """Tests for object ID consistency"""
     
-    def test_all_ids_unique(self, test_env):
+    def test_all_ids_unique(self, ls_data):
         """Test that all object IDs are unique"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         
         ids = [obj["id"] for obj in data["objects"]]
         assert len(ids) == len(set(ids)), "Duplicate IDs found"
     
-    def test_ids_are_positive(self, test_env):
+    def test_ids_are_positive(self, ls_data):
         """Test that all object IDs are non-negative"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         
         for obj in data["objects"]:
             assert obj["id"] >= 0, f"Negative ID found: {obj['id']}"
@@ -260,16 +155,15 @@ class TestObjectIdUniqueness:
 class TestResponseFormat:
     """Tests for response format consistency"""
     
-    def test_content_type_is_json(self, test_env):
+    def test_content_type_is_json(self, test_env, http):
         """Test that response Content-Type is application/json"""
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
+        response = http.get(test_env.urls.ls)
         assert "application/json" in response.headers.get("Content-Type", "")
     
-    def test_empty_list_format(self, test_env):
+    def test_empty_list_format(self, ls_data):
         """Test that filtering might return empty list with proper format"""
         # Get all objects and filter for a type that might not exist
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         
         assert "objects" in data
         assert isinstance(data["objects"], list)
@@ -279,64 +173,59 @@ class TestResponseFormat:
         assert isinstance(links, list)  # Should be a list even if empty
 
 
+@pytest.mark.usefixtures("ls_data")
 class TestGetObjectById:
     """Tests for GET /api/v1/objects/:id"""
     
-    def test_get_object_by_id_returns_200(self, test_env):
+    def test_get_object_by_id_returns_200(self, test_env, http, ls_data):
         """Test that getting an existing object returns 200 OK"""
         # First get a list of objects to find a valid ID
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         assert len(data["objects"]) > 0, "No objects found"
         
         obj_id = data["objects"][0]["id"]
-        response = requests.get(f"{test_env.base_url}/api/v1/objects/{obj_id}")
+        response = http.get(f"{test_env.base_url}/api/v1/objects/{obj_id}")
         assert response.status_code == 200
     
-    def test_get_object_by_id_returns_correct_object(self, test_env):
+    def test_get_object_by_id_returns_correct_object(self, test_env, http, ls_data):
         """Test that the returned object has the correct ID"""
         # Get a list of objects to find a valid ID
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         assert len(data["objects"]) > 0, "No objects found"
         
         obj_id = data["objects"][0]["id"]
-        response = requests.get(f"{test_env.base_url}/api/v1/objects/{obj_id}")
-        obj = response.json()
+        response = http.get(f"{test_env.base_url}/api/v1/objects/{obj_id}")
+        obj = jload(response)
         
         assert obj["id"] == obj_id
     
-    def test_get_object_by_id_has_required_fields(self, test_env):
+    def test_get_object_by_id_has_required_fields(self, test_env, http, ls_data):
         """Test that the returned object has all required fields"""
         # Get a list of objects to find a valid ID
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         assert len(data["objects"]) > 0, "No objects found"
         
         obj_id = data["objects"][0]["id"]
-        response = requests.get(f"{test_env.base_url}/api/v1/objects/{obj_id}")
-        obj = response.json()
+        response = http.get(f"{test_env.base_url}/api/v1/objects/{obj_id}")
+        obj = jload(response)
         
-        assert "id" in obj
-        assert "name" in obj
-        assert "type" in obj
+        check_object(obj)
     
-    def test_get_object_by_invalid_id_returns_404(self, test_env):
+    def test_get_object_by_invalid_id_returns_404(self, test_env, http):
         """Test that getting a non-existent object returns 404"""
-        response = requests.get(f"{test_env.base_url}/api/v1/objects/999999")
+        response = http.get(f"{test_env.base_url}/api/v1/objects/999999")
         assert response.status_code == 404
     
-    def test_get_object_matches_list(self, test_env):
+    def test_get_object_matches_list(self, test_env, http, ls_data):
         """Test that getting an object by ID matches the list data"""
         # Get all objects
-        response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        data = response.json()
+        data = ls_data
         assert len(data["objects"]) > 0, "No objects found"
         
         # Pick an object and verify it matches
         list_obj = data["objects"][0]
-        response = requests.get(f"{test_env.base_url}/api/v1/objects/{list_obj['id']}")
-        single_obj = response.json()
+        response = http.get(f"{test_env.base_url}/api/v1/objects/{list_obj['id']}")
+        single_obj = jload(response)
         
         assert single_obj["id"] == list_obj["id"]
         assert single_obj["name"] == list_obj["name"]
@@ -346,36 +235,36 @@ class TestGetObjectById:
 class TestCacheRefresh:
     """Tests for POST /api/v1/cache/refresh"""
     
-    def test_refresh_cache_returns_200(self, test_env):
+    def test_refresh_cache_returns_200(self, test_env, http):
         """Test that refreshing cache returns 200 OK"""
-        response = requests.post(f"{test_env.base_url}/api/v1/cache/refresh")
+        response = http.post(test_env.urls.cache_refresh)
         assert response.status_code == 200
     
-    def test_refresh_cache_returns_status(self, test_env):
+    def test_refresh_cache_returns_status(self, test_env, http):
         """Test that refresh response includes status"""
-        response = requests.post(f"{test_env.base_url}/api/v1/cache/refresh")
-        data = response.json()
+        response = http.post(test_env.urls.cache_refresh)
+        data = jload(response)
         
         assert "status" in data
         assert data["status"] == "ok"
     
-    def test_refresh_cache_returns_object_count(self, test_env):
+    def test_refresh_cache_returns_object_count(self, test_env, http):
         """Test that refresh response includes object count"""
-        response = requests.post(f"{test_env.base_url}/api/v1/cache/refresh")
-        data = response.json()
+        response = http.post(test_env.urls.cache_refresh)
+        data = jload(response)
         
         assert "object_count" in data
         assert isinstance(data["object_count"], int)
         assert data["object_count"] >= 0
     
-    def test_refresh_cache_object_count_matches_ls(self, test_env):
+    def test_refresh_cache_object_count_matches_ls(self, test_env, http):
         """Test that cache object count matches ls endpoint"""
         # Refresh the cache
-        refresh_response = requests.post(f"{test_env.base_url}/api/v1/cache/refresh")
-        refresh_data = refresh_response.json()
+        refresh_response = http.post(test_env.urls.cache_refresh)
+        refresh_data = jload(refresh_response)
         
         # Get all objects
-        ls_response = requests.get(f"{test_env.base_url}/api/v1/ls")
-        ls_data = ls_response.json()
+        ls_response = http.get(test_env.urls.ls)
+        ls_data = jload(ls_response)
         
         assert refresh_data["object_count"] == len(ls_data["objects"])
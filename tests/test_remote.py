@@ -40,6 +40,9 @@ def main():
     pytest_args = [
         "python3", "-m", "pytest",
         "-m", "not local_only",  # Skip tests marked as local_only
+        # All tests share the one remote server, so don't run them in
+        # parallel even if pytest-xdist is installed and -n is configured
+        "-p", "no:xdist",
     ]
     
     # Add any additional arguments (like -v, specific test files)
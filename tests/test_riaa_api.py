@@ -1,267 +1,213 @@
-import requests
 import pytest
 import subprocess
-from pipewire_utils import get_pipewire_param, verify_param_set
+from pipewire_utils import get_pipewire_param, verify_param_set, verify_params_set
 
 
-# Note: api_server fixture is provided by conftest.py (session-scoped)
+# All tests here change the same RIAA node; with pytest-xdist
+# (--dist=loadgroup) they run sequentially on one worker. Every test is
+# skipped when there is no RIAA node.
+pytestmark = [
+    pytest.mark.xdist_group("pipewire-params"),
+    pytest.mark.usefixtures("riaa_node_id"),
+]
+
+
+# Note: api_server, http and riaa_node_id fixtures are provided by conftest.py (session-scoped)
+# Tests that change settings take riaa_restore to undo their changes
 # Tests marked with @pytest.mark.local_only require local pw-cli access
 
 
-def find_riaa_node(base_url):
-    """Find RIAA node in the PipeWire graph."""
-    response = requests.get(f"{base_url}/api/v1/ls")
+NUMBER = (int, float)
+
+
+def has_type(value, expected_type):
+    """isinstance(), except that bools don't count as int or float values"""
+    if type(value) is bool:
+        return expected_type is bool
+    return isinstance(value, expected_type)
+
+
+# Fields every /api/v1/module/riaa/config response must contain, with their types
+RIAA_CONFIG_TYPES = {
+    "gain_db": NUMBER,
+    "subsonic_filter": int,
+    "riaa_enable": bool,
+    "declick_enable": bool,
+    "spike_threshold_db": NUMBER,
+    "spike_width_ms": NUMBER,
+    "notch_filter_enable": bool,
+    "notch_frequency_hz": NUMBER,
+    "notch_q_factor": NUMBER,
+}
+RIAA_CONFIG_FIELDS = frozenset(RIAA_CONFIG_TYPES)
+
+
+@pytest.fixture(scope="module")
+def riaa_config(api_server, http, riaa_node_id):
+    """RIAA configuration, fetched once for the tests that only inspect it"""
+    response = http.get(f"{api_server}/api/v1/module/riaa/config")
     assert response.status_code == 200
-    data = response.json()
-    
-    objects = data.get("objects", [])
-    for obj in objects:
-        if obj.get("name") == "riaa" and obj.get("type") == "node":
-            return obj["id"]
-    
-    pytest.skip("RIAA node not found")
+    return response.json()
 
 
-def test_find_riaa_node(api_server):
+def test_find_riaa_node(riaa_node_id):
     """Test that we can find the RIAA node."""
-    node_id = find_riaa_node(api_server)
+    node_id = riaa_node_id
     assert node_id is not None
     assert isinstance(node_id, int)
 
 
-def test_get_config(api_server):
+def test_get_config(riaa_config):
     """Test getting RIAA configuration."""
-    find_riaa_node(api_server)  # Ensure node exists
-    
-    response = requests.get(f"{api_server}/api/v1/module/riaa/config")
-    assert response.status_code == 200
-    
-    config = response.json()
-    assert "gain_db" in config
-    assert "subsonic_filter" in config
-    assert "riaa_enable" in config
-    assert "declick_enable" in config
-    assert "spike_threshold_db" in config
-    assert "spike_width_ms" in config
-    assert "notch_filter_enable" in config
-    assert "notch_frequency_hz" in config
-    assert "notch_q_factor" in config
+    missing = RIAA_CONFIG_FIELDS - riaa_config.keys()
+    assert not missing, f"Config missing fields: {sorted(missing)}"
+
+
+@pytest.mark.parametrize("key, expected_type", RIAA_CONFIG_TYPES.items(), ids=list(RIAA_CONFIG_TYPES))
+def test_config_field_type(riaa_config, key, expected_type):
+    """Test the type of each field of the RIAA configuration."""
+    assert key in riaa_config
+    assert has_type(riaa_config[key], expected_type), f"{key} has type {type(riaa_config[key]).__name__}"
 
 
 @pytest.mark.local_only
-def test_set_default(api_server):
+def test_set_default(api_server, http, riaa_node_id, riaa_restore):
     """Test setting RIAA to default values and verify they persist."""
-    node_id = find_riaa_node(api_server)
+    node_id = riaa_node_id
     
-    # First set some non-default values
-    requests.put(f"{api_server}/api/v1/module/riaa/gain", json={"gain_db": 5.0})
-    requests.put(f"{api_server}/api/v1/module/riaa/subsonic", json={"filter": 1})
-    requests.put(f"{api_server}/api/v1/module/riaa/riaa-enable", json={"enabled": True})
-    requests.put(f"{api_server}/api/v1/module/riaa/declick", json={"enabled": True})
+    # First set some non-default values in one request
+    response = http.put(f"{api_server}/api/v1/module/riaa/config", json={
+        "gain_db": 5.0,
+        "subsonic_filter": 1,
+        "riaa_enable": True,
+        "declick_enable": True,
+    })
+    assert response.status_code == 200
     
     # Reset to defaults
-    response = requests.put(f"{api_server}/api/v1/module/riaa/set-default")
+    response = http.put(f"{api_server}/api/v1/module/riaa/set-default")
     assert response.status_code == 200
     
     result = response.json()
     assert result["status"] == "ok"
     
     # Verify defaults are actually set in PipeWire
-    assert verify_param_set(node_id, "riaa:Gain (dB)", 0.0), \
-        "Gain not reset to 0.0 dB"
-    assert verify_param_set(node_id, "riaa:Subsonic Filter", 0), \
-        "Subsonic filter not reset to 0"
-    assert verify_param_set(node_id, "riaa:RIAA Enable", False), \
-        "RIAA Enable not reset to False"
-    assert verify_param_set(node_id, "riaa:Declick Enable", False), \
-        "Declick Enable not reset to False"
-
-
-def test_get_gain(api_server):
-    """Test getting RIAA gain."""
-    find_riaa_node(api_server)
-    
-    response = requests.get(f"{api_server}/api/v1/module/riaa/gain")
-    assert response.status_code == 200
-    
-    data = response.json()
-    assert "gain_db" in data
-    assert isinstance(data["gain_db"], (int, float))
+    results = verify_params_set(node_id, {
+        "riaa:Gain (dB)": 0.0,
+        "riaa:Subsonic Filter": 0,
+        "riaa:RIAA Enable": False,
+        "riaa:Declick Enable": False,
+    })
+    not_reset = [name for name, ok in results.items() if not ok]
+    assert not not_reset, f"Not reset to defaults: {not_reset}"
 
 
 @pytest.mark.local_only
-def test_set_gain(api_server):
-    """Test setting RIAA gain and verify it persists in PipeWire."""
-    node_id = find_riaa_node(api_server)
-    
-    # Set gain to 3.5 dB via API
-    response = requests.put(f"{api_server}/api/v1/module/riaa/gain", json={"gain_db": 3.5})
+def test_set_config(api_server, http, riaa_node_id, riaa_restore):
+    """Test setting several RIAA settings with one PUT to the config endpoint."""
+    payload = {
+        "gain_db": 2.5,
+        "subsonic_filter": 1,
+        "notch_filter_enable": True,
+        "notch_frequency_hz": 60.0,
+    }
+    response = http.put(f"{api_server}/api/v1/module/riaa/config", json=payload)
     assert response.status_code == 200
     
     result = response.json()
     assert result["status"] == "ok"
-    assert result["gain_db"] == 3.5
-    
-    # Verify the value actually persists in PipeWire
-    assert verify_param_set(node_id, "riaa:Gain (dB)", 3.5), \
-        "Gain parameter was not set in PipeWire"
-
-
-def test_get_subsonic_filter(api_server):
-    """Test getting RIAA subsonic filter setting."""
-    find_riaa_node(api_server)
-    
-    response = requests.get(f"{api_server}/api/v1/module/riaa/subsonic")
-    assert response.status_code == 200
-    
-    data = response.json()
-    assert "filter" in data
-    assert isinstance(data["filter"], int)
-
-
-@pytest.mark.local_only
-def test_set_subsonic_filter(api_server):
-    """Test setting RIAA subsonic filter and verify it persists."""
-    node_id = find_riaa_node(api_server)
-    
-    response = requests.put(f"{api_server}/api/v1/module/riaa/subsonic", json={"filter": 1})
-    assert response.status_code == 200
-    
-    result = response.json()
-    assert result["status"] == "ok"
-    assert result["filter"] == 1
-    
-    # Verify the value persists in PipeWire
-    assert verify_param_set(node_id, "riaa:Subsonic Filter", 1), \
-        "Subsonic filter not set in PipeWire"
-
-
-def test_get_riaa_enable(api_server):
-    """Test getting RIAA enable status."""
-    find_riaa_node(api_server)
     
-    response = requests.get(f"{api_server}/api/v1/module/riaa/riaa-enable")
-    assert response.status_code == 200
-    
-    data = response.json()
-    assert "enabled" in data
-    assert isinstance(data["enabled"], bool)
+    results = verify_params_set(riaa_node_id, {
+        "riaa:Gain (dB)": 2.5,
+        "riaa:Subsonic Filter": 1,
+        "riaa:Notch Filter Enable": True,
+        "riaa:Notch Frequency (Hz)": 60.0,
+    })
+    not_set = [name for name, ok in results.items() if not ok]
+    assert not not_set, f"Not set in PipeWire: {not_set}"
 
 
-@pytest.mark.local_only
-def test_set_riaa_enable(api_server):
-    """Test setting RIAA enable and verify it persists."""
-    node_id = find_riaa_node(api_server)
-    
-    response = requests.put(f"{api_server}/api/v1/module/riaa/riaa-enable", json={"enabled": True})
-    assert response.status_code == 200
-    
-    result = response.json()
-    assert result["status"] == "ok"
-    assert result["enabled"] == True
-    
-    # Verify the value persists in PipeWire
-    assert verify_param_set(node_id, "riaa:RIAA Enable", True), \
-        "RIAA Enable not set in PipeWire"
+def test_set_config_empty(api_server, http, riaa_node_id):
+    """Test that a config PUT without any settings is rejected."""
+    response = http.put(f"{api_server}/api/v1/module/riaa/config", json={})
+    assert response.status_code == 400
 
 
-def test_get_declick_enable(api_server):
-    """Test getting declick enable status."""
-    find_riaa_node(api_server)
-    
-    response = requests.get(f"{api_server}/api/v1/module/riaa/declick")
+def test_set_config_spike_and_notch(api_server, http, riaa_node_id, riaa_restore):
+    """Test setting the spike and notch settings with one PUT and reading them back with one GET."""
+    payload = {
+        "spike_threshold_db": 25.0,
+        "spike_width_ms": 2.0,
+        "notch_filter_enable": True,
+        "notch_frequency_hz": 300.0,
+        "notch_q_factor": 30.0,
+    }
+    response = http.put(f"{api_server}/api/v1/module/riaa/config", json=payload)
     assert response.status_code == 200
+    assert response.json()["status"] == "ok"
     
-    data = response.json()
-    assert "enabled" in data
-    assert isinstance(data["enabled"], bool)
-
-
-@pytest.mark.local_only
-def test_set_declick_enable(api_server):
-    """Test setting declick enable and verify it persists."""
-    node_id = find_riaa_node(api_server)
-    
-    response = requests.put(f"{api_server}/api/v1/module/riaa/declick", json={"enabled": True})
+    response = http.get(f"{api_server}/api/v1/module/riaa/config")
     assert response.status_code == 200
-    
-    result = response.json()
-    assert result["status"] == "ok"
-    assert result["enabled"] == True
-    
-    # Verify the value persists in PipeWire
-    assert verify_param_set(node_id, "riaa:Declick Enable", True), \
-        "Declick Enable not set in PipeWire"
+    config = response.json()
+    for key, value in payload.items():
+        assert config[key] == pytest.approx(value), f"{key} not applied"
 
 
-def test_get_spike_config(api_server):
-    """Test getting spike detection configuration."""
-    find_riaa_node(api_server)
-    
-    response = requests.get(f"{api_server}/api/v1/module/riaa/spike")
+@pytest.mark.parametrize("endpoint, expected_types", [
+    pytest.param("gain", {"gain_db": NUMBER}, id="gain"),
+    pytest.param("subsonic", {"filter": int}, id="subsonic"),
+    pytest.param("riaa-enable", {"enabled": bool}, id="riaa-enable"),
+    pytest.param("declick", {"enabled": bool}, id="declick"),
+    pytest.param("spike", {"threshold_db": NUMBER, "width_ms": NUMBER}, id="spike"),
+    pytest.param("notch", {"enabled": bool, "frequency_hz": NUMBER, "q_factor": NUMBER}, id="notch"),
+])
+def test_get_setting(api_server, http, riaa_node_id, endpoint, expected_types):
+    """Test getting a RIAA setting."""
+    response = http.get(f"{api_server}/api/v1/module/riaa/{endpoint}")
     assert response.status_code == 200
     
     data = response.json()
-    assert "threshold_db" in data
-    assert "width_ms" in data
-    assert isinstance(data["threshold_db"], (int, float))
-    assert isinstance(data["width_ms"], (int, float))
-
-
-def test_set_spike_config(api_server):
-    """Test setting spike detection configuration."""
-    find_riaa_node(api_server)
-    
-    response = requests.put(
-        f"{api_server}/api/v1/module/riaa/spike",
-        json={"threshold_db": 25.0, "width_ms": 2.0}
-    )
+    for key, expected_type in expected_types.items():
+        assert key in data
+        assert has_type(data[key], expected_type), f"{key} has type {type(data[key]).__name__}"
+
+
+@pytest.mark.parametrize("endpoint, payload, pw_param, pw_value", [
+    pytest.param("gain", {"gain_db": 3.5}, "riaa:Gain (dB)", 3.5,
+                 marks=pytest.mark.local_only, id="gain"),
+    pytest.param("subsonic", {"filter": 1}, "riaa:Subsonic Filter", 1,
+                 marks=pytest.mark.local_only, id="subsonic"),
+    pytest.param("riaa-enable", {"enabled": True}, "riaa:RIAA Enable", True,
+                 marks=pytest.mark.local_only, id="riaa-enable"),
+    pytest.param("declick", {"enabled": True}, "riaa:Declick Enable", True,
+                 marks=pytest.mark.local_only, id="declick"),
+    pytest.param("spike", {"threshold_db": 25.0, "width_ms": 2.0}, None, None, id="spike"),
+    pytest.param("notch", {"enabled": True, "frequency_hz": 300.0, "q_factor": 30.0}, None, None, id="notch"),
+])
+def test_set_setting(api_server, http, riaa_node_id, riaa_restore, endpoint, payload, pw_param, pw_value):
+    """Test setting a RIAA setting and, where given, verify it persists in PipeWire."""
+    response = http.put(f"{api_server}/api/v1/module/riaa/{endpoint}", json=payload)
     assert response.status_code == 200
     
     result = response.json()
     assert result["status"] == "ok"
-    assert result["threshold_db"] == 25.0
-    assert result["width_ms"] == 2.0
-
-
-def test_get_notch_config(api_server):
-    """Test getting notch filter configuration."""
-    find_riaa_node(api_server)
     
-    response = requests.get(f"{api_server}/api/v1/module/riaa/notch")
-    assert response.status_code == 200
-    
-    data = response.json()
-    assert "enabled" in data
-    assert "frequency_hz" in data
-    assert "q_factor" in data
-    assert isinstance(data["enabled"], bool)
-    assert isinstance(data["frequency_hz"], (int, float))
-    assert isinstance(data["q_factor"], (int, float))
-
-
-def test_set_notch_config(api_server):
-    """Test setting notch filter configuration."""
-    find_riaa_node(api_server)
-    
-    response = requests.put(
-        f"{api_server}/api/v1/module/riaa/notch",
-        json={"enabled": True, "frequency_hz": 300.0, "q_factor": 30.0}
-    )
-    assert response.status_code == 200
-    
-    result = response.json()
-    assert result["status"] == "ok"
-    assert result["enabled"] == True
-    assert result["frequency_hz"] == 300.0
-    assert result["q_factor"] == 30.0
+    # Verify the value actually persists in PipeWire, or else read it back
+    if pw_param is not None:
+        assert verify_param_set(riaa_node_id, pw_param, pw_value), \
+            f"{pw_param} was not set in PipeWire"
+    else:
+        response = http.get(f"{api_server}/api/v1/module/riaa/{endpoint}")
+        assert response.status_code == 200
+        data = response.json()
+        for key, value in payload.items():
+            assert data[key] == pytest.approx(value), f"{key} not applied"
 
 
-def test_save(api_server):
+def test_save(api_server, http, riaa_node_id):
     """Test that the save endpoint returns a successful response."""
-    find_riaa_node(api_server)  # Ensure node exists
     
-    response = requests.post(f"{api_server}/api/v1/module/riaa/save")
+    response = http.post(f"{api_server}/api/v1/module/riaa/save")
     assert response.status_code == 200
     
     data = response.json()
@@ -5,45 +5,73 @@ Tests the ability to save and restore settings for speakereq and riaa modules.
 """
 
 import pytest
-import requests
-import json
 import os
 import tempfile
 
+from pipewire_utils import load_settings, wait_until
 
-def get_settings_file_path(api_server):
-    """Get the actual settings file path from the server"""
-    response = requests.post(f"{api_server}/api/v1/settings/save")
-    if response.status_code == 200:
-        data = response.json()
-        return data.get("path")
-    return None
+
+# Saving and restoring settings touches the speakereq and RIAA nodes, so
+# these tests share the xdist group of the speakereq and RIAA tests
+pytestmark = pytest.mark.xdist_group("pipewire-params")
+
+
+# Note: api_server, http and settings_file_path are provided by conftest.py (session-scoped)
+
+# Extra time (seconds) allowed for an auto-save beyond one interval
+AUTOSAVE_GRACE = 5
+
+# Fields the saved settings of each module must contain
+SPEAKEREQ_SETTINGS_FIELDS = frozenset({"enabled", "master_gain_db", "inputs", "outputs"})
+RIAA_SETTINGS_FIELDS = frozenset({"gain_db", "riaa_enable", "declick_enable", "subsonic_filter"})
+
+
+def get_settings_stats(api_server, http):
+    """Current auto-save statistics of the server"""
+    response = http.get(f"{api_server}/api/v1/settings/stats")
+    assert response.status_code == 200
+    return response.json()
 
 
-@pytest.fixture(autouse=True)
-def cleanup_settings_file(api_server):
-    """Clean up settings file before and after each test"""
-    # Get the actual path from first save
-    path = get_settings_file_path(api_server)
+def wait_for_save(api_server, http, baseline_saves, timeout):
+    """
+    Wait until the server has written the settings file again after a
+    baseline taken from the saves_committed statistic.
     
-    # Remove before test
-    if path and os.path.exists(path):
-        os.remove(path)
+    Returns:
+        True if a save happened before the timeout
+    """
+    return wait_until(
+        lambda: get_settings_stats(api_server, http)["saves_committed"] > baseline_saves,
+        timeout=timeout, interval=0.1
+    )
+
+
+@pytest.fixture(scope="module")
+def autosave_interval(api_server, http):
+    """Auto-save interval of the server in seconds"""
+    return get_settings_stats(api_server, http)["interval_secs"]
+
+
+@pytest.fixture
+def clean_settings_file(settings_file_path):
+    """Remove the settings file before and after a test that needs none"""
+    if os.path.exists(settings_file_path):
+        os.remove(settings_file_path)
     
-    yield
+    yield settings_file_path
     
-    # Remove after test  
-    if path and os.path.exists(path):
-        os.remove(path)
+    if os.path.exists(settings_file_path):
+        os.remove(settings_file_path)
 
 
 @pytest.mark.local_only
 class TestSettingsSaveRestore:
     """Test settings save/restore functionality"""
     
-    def test_save_settings_creates_file(self, api_server):
+    def test_save_settings_creates_file(self, api_server, http, clean_settings_file):
         """Test that saving settings creates the JSON file"""
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        response = http.post(f"{api_server}/api/v1/settings/save")
         
         assert response.status_code == 200
         data = response.json()
@@ -54,98 +82,85 @@ class TestSettingsSaveRestore:
         settings_file_path = data["path"]
         assert os.path.exists(settings_file_path)
     
-    def test_save_settings_json_structure(self, api_server):
+    def test_save_settings_json_structure(self, api_server, http):
         """Test that saved settings have correct JSON structure"""
         # Save settings
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
         settings_file_path = response.json()["path"]
         
         # Read and verify JSON structure
-        with open(settings_file_path, 'r') as f:
-            settings = json.load(f)
+        settings = load_settings(settings_file_path)
         
         assert "version" in settings
         assert len(settings["version"].split(".")) >= 2  # valid semver-like string
         assert "speakereq" in settings
         assert "riaa" in settings
     
-    def test_save_includes_speakereq_settings(self, api_server):
+    def test_save_includes_speakereq_settings(self, api_server, http):
         """Test that saved settings include speakereq module configuration"""
         # Check if speakereq module is available
-        status_response = requests.get(f"{api_server}/api/v1/module/speakereq/status")
+        status_response = http.get(f"{api_server}/api/v1/module/speakereq/status")
         if status_response.status_code != 200:
             pytest.skip("SpeakerEQ module not available")
         
         # Save settings
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
         settings_file_path = response.json()["path"]
         
         # Verify saved content
-        with open(settings_file_path, 'r') as f:
-            settings = json.load(f)
+        settings = load_settings(settings_file_path)
         
         # Verify speakereq data is present
         assert settings.get("speakereq") is not None, "SpeakerEQ settings should be saved"
         speakereq = settings["speakereq"]
-        assert "enabled" in speakereq
-        assert "master_gain_db" in speakereq
-        assert "inputs" in speakereq
-        assert "outputs" in speakereq
+        missing = SPEAKEREQ_SETTINGS_FIELDS - speakereq.keys()
+        assert not missing, f"SpeakerEQ settings missing fields: {sorted(missing)}"
     
-    def test_save_includes_riaa_settings(self, api_server):
+    def test_save_includes_riaa_settings(self, api_server, http):
         """Test that saved settings include riaa module configuration"""
         # Check if riaa module is available
-        config_response = requests.get(f"{api_server}/api/v1/module/riaa/config")
+        config_response = http.get(f"{api_server}/api/v1/module/riaa/config")
         if config_response.status_code != 200:
             pytest.skip("RIAA module not available")
         
         # Save settings
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
         settings_file_path = response.json()["path"]
         
         # Verify saved content
-        with open(settings_file_path, 'r') as f:
-            settings = json.load(f)
+        settings = load_settings(settings_file_path)
         
         # Verify riaa data is present
         assert settings.get("riaa") is not None, "RIAA settings should be saved"
         riaa = settings["riaa"]
-        assert "gain_db" in riaa
-        assert "riaa_enable" in riaa
-        assert "declick_enable" in riaa
-        assert "subsonic_filter" in riaa
+        missing = RIAA_SETTINGS_FIELDS - riaa.keys()
+        assert not missing, f"RIAA settings missing fields: {sorted(missing)}"
     
-    def test_restore_without_file_returns_success(self, api_server):
+    def test_restore_without_file_returns_success(self, api_server, http, clean_settings_file):
         """Test that restore returns success even when no settings file exists"""
-        # Get path and ensure file doesn't exist
-        response = requests.post(f"{api_server}/api/v1/settings/save")
-        settings_file_path = response.json()["path"]
-        
-        if os.path.exists(settings_file_path):
-            os.remove(settings_file_path)
+        assert not os.path.exists(clean_settings_file)
         
-        response = requests.post(f"{api_server}/api/v1/settings/restore")
+        response = http.post(f"{api_server}/api/v1/settings/restore")
         
         # Should return success with 0 modules restored
         assert response.status_code in [200, 400, 404]
     
-    def test_full_save_restore_workflow(self, api_server):
+    def test_full_save_restore_workflow(self, api_server, http):
         """Test complete save/restore workflow"""
         # Save current settings
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
         settings_file_path = response.json()["path"]
         assert os.path.exists(settings_file_path)
         
         # Read what was saved
-        with open(settings_file_path, 'r') as f:
-            original_settings = json.load(f)
+        original_settings = load_settings(settings_file_path)
         
         # Restore settings
-        response = requests.post(f"{api_server}/api/v1/settings/restore")
+        response = http.post(f"{api_server}/api/v1/settings/restore")
         assert response.status_code == 200
         
         data = response.json()
@@ -155,13 +170,13 @@ class TestSettingsSaveRestore:
         # Verify response has modules list
         assert isinstance(data["modules_restored"], list)
     
-    def test_restore_response_format(self, api_server):
+    def test_restore_response_format(self, api_server, http):
         """Test that restore response has correct format"""
         # Save some settings first
-        requests.post(f"{api_server}/api/v1/settings/save")
+        http.post(f"{api_server}/api/v1/settings/save")
         
         # Restore
-        response = requests.post(f"{api_server}/api/v1/settings/restore")
+        response = http.post(f"{api_server}/api/v1/settings/restore")
         assert response.status_code == 200
         
         data = response.json()
@@ -170,44 +185,40 @@ class TestSettingsSaveRestore:
         assert isinstance(data["modules_restored"], list)
         assert isinstance(data["success"], bool)
     
-    def test_multiple_save_overwrites(self, api_server):
+    def test_multiple_save_overwrites(self, api_server, http):
         """Test that multiple saves overwrite the previous file"""
         # First save
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
         settings_file_path = response.json()["path"]
         
-        # Get file modification time
-        mtime1 = os.path.getmtime(settings_file_path)
-        
-        # Wait a bit to ensure different timestamp
-        import time
-        time.sleep(0.1)
+        # The server replaces the file atomically with a newly written one,
+        # so every save gives it a new inode
+        inode_before = os.stat(settings_file_path).st_ino
         
         # Second save
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
         
-        # Verify file was updated
-        mtime2 = os.path.getmtime(settings_file_path)
-        assert mtime2 >= mtime1  # Allow for equal in case of very fast filesystem
+        # Verify file was replaced and no temporary file was left behind
+        assert os.stat(settings_file_path).st_ino != inode_before, "Second save did not replace the file"
+        assert not os.path.exists(settings_file_path + ".tmp")
     
-    def test_settings_file_is_valid_json(self, api_server):
+    def test_settings_file_is_valid_json(self, api_server, http):
         """Test that settings file can be parsed as valid JSON"""
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
         settings_file_path = response.json()["path"]
         
         # Should not raise JSONDecodeError
-        with open(settings_file_path, 'r') as f:
-            settings = json.load(f)
+        settings = load_settings(settings_file_path)
         
         assert isinstance(settings, dict)
     
-    def test_settings_directory_created_automatically(self, api_server):
+    def test_settings_directory_created_automatically(self, api_server, http):
         """Test that the settings directory is created if it doesn't exist"""
         # The directory should be created automatically by the save endpoint
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
         
         # Verify directory exists
@@ -215,24 +226,36 @@ class TestSettingsSaveRestore:
         settings_dir = os.path.dirname(settings_file_path)
         assert os.path.isdir(settings_dir)
     
-    def test_concurrent_module_settings(self, api_server):
+    def test_concurrent_module_settings(self, api_server, http):
         """Test that both speakereq and riaa settings can be saved together"""
         # Save
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
         settings_file_path = response.json()["path"]
         
         # Verify both modules are in the file (or at least the structure is there)
-        with open(settings_file_path, 'r') as f:
-            settings = json.load(f)
+        settings = load_settings(settings_file_path)
         
         # Should have both keys present (may be None if modules not configured)
         assert "speakereq" in settings
         assert "riaa" in settings
     
-    def test_save_response_format(self, api_server):
+    def test_stats_count_saves(self, api_server, http):
+        """Test that the stats endpoint counts explicit saves"""
+        before = get_settings_stats(api_server, http)
+        assert isinstance(before["interval_secs"], int)
+        assert before["interval_secs"] > 0
+        
+        response = http.post(f"{api_server}/api/v1/settings/save")
+        assert response.status_code == 200
+        
+        after = get_settings_stats(api_server, http)
+        assert after["saves_committed"] > before["saves_committed"]
+        assert isinstance(after["last_save_ts"], int)
+    
+    def test_save_response_format(self, api_server, http):
         """Test that save response has the expected format"""
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
         
         data = response.json()
@@ -247,103 +270,88 @@ class TestSettingsSaveRestore:
 class TestAutoSave:
     """Test auto-save functionality"""
     
-    def test_auto_save_after_setting_change(self, api_server):
+    def test_auto_save_after_setting_change(self, api_server, http, settings_file_path, autosave_interval):
         """Test that settings are auto-saved after a change"""
-        import time
-        
-        # Get settings file path
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        # Save explicitly so the file matches the current settings
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
-        settings_path = response.json()["path"]
         
         # Read initial settings
-        with open(settings_path, 'r') as f:
-            initial_settings = json.load(f)
+        initial_settings = load_settings(settings_file_path)
         initial_gain = initial_settings["speakereq"]["master_gain_db"]
         
         # Change a setting (master gain for speakereq)
         new_gain = 5.5
-        response = requests.put(
+        baseline = get_settings_stats(api_server, http)["saves_committed"]
+        response = http.put(
             f"{api_server}/api/v1/module/speakereq/gain/master",
             json={"gain": new_gain}
         )
         assert response.status_code == 200
         
-        # Wait for auto-save (default interval is 10 seconds, plus some buffer)
-        print("Waiting 12 seconds for auto-save...")
-        time.sleep(12)
+        # Wait for the next auto-save instead of a full worst-case interval
+        assert wait_for_save(api_server, http, baseline, timeout=autosave_interval + AUTOSAVE_GRACE), \
+            "Settings were not auto-saved after the change"
         
         # Verify the change is in the file
-        with open(settings_path, 'r') as f:
-            settings = json.load(f)
+        settings = load_settings(settings_file_path)
         
         assert settings["speakereq"] is not None
         current_gain = settings["speakereq"]["master_gain_db"]
         assert current_gain == new_gain, f"Expected gain {new_gain}, but got {current_gain}"
     
-    def test_auto_save_after_default_reset(self, api_server):
+    def test_auto_save_after_default_reset(self, api_server, http, settings_file_path, autosave_interval):
         """Test that settings are auto-saved after reset to defaults"""
-        import time
-        
-        # Get settings file path
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        # Save explicitly so the file matches the current settings
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
-        settings_path = response.json()["path"]
         
         # Change a setting first
-        response = requests.put(
+        baseline = get_settings_stats(api_server, http)["saves_committed"]
+        response = http.put(
             f"{api_server}/api/v1/module/speakereq/gain/master",
             json={"gain": 8.0}
         )
         assert response.status_code == 200
         
         # Wait for auto-save
-        time.sleep(12)
+        assert wait_for_save(api_server, http, baseline, timeout=autosave_interval + AUTOSAVE_GRACE), \
+            "Settings were not auto-saved after the change"
         
         # Read settings to confirm change
-        with open(settings_path, 'r') as f:
-            settings_before = json.load(f)
+        settings_before = load_settings(settings_file_path)
         assert settings_before["speakereq"]["master_gain_db"] == 8.0
         
         # Reset to defaults
-        response = requests.post(f"{api_server}/api/v1/module/speakereq/default")
+        baseline = get_settings_stats(api_server, http)["saves_committed"]
+        response = http.post(f"{api_server}/api/v1/module/speakereq/default")
         assert response.status_code == 200
         
         # Wait for auto-save
-        print("Waiting 12 seconds for auto-save after default reset...")
-        time.sleep(12)
+        assert wait_for_save(api_server, http, baseline, timeout=autosave_interval + AUTOSAVE_GRACE), \
+            "Settings were not auto-saved after the default reset"
         
         # Verify settings were reset to default (master_gain_db should be 0.0)
-        with open(settings_path, 'r') as f:
-            settings_after = json.load(f)
+        settings_after = load_settings(settings_file_path)
         
         assert settings_after["speakereq"] is not None
         assert settings_after["speakereq"]["master_gain_db"] == 0.0, "Gain should be reset to 0.0"
     
-    def test_auto_save_no_change_no_save(self, api_server):
+    def test_auto_save_no_change_no_save(self, api_server, http, settings_file_path, autosave_interval):
         """Test that auto-save doesn't save when nothing changed"""
-        import time
-        
-        # Get settings file path
-        response = requests.post(f"{api_server}/api/v1/settings/save")
+        # Save explicitly so the file matches the current settings
+        response = http.post(f"{api_server}/api/v1/settings/save")
         assert response.status_code == 200
-        settings_path = response.json()["path"]
-        
-        # Record modification time
-        initial_mtime = os.path.getmtime(settings_path)
         
-        # Wait for multiple auto-save intervals without making changes
-        print("Waiting 25 seconds to verify no unnecessary saves...")
-        time.sleep(25)
+        # Record the save count
+        initial_saves = get_settings_stats(api_server, http)["saves_committed"]
         
-        # File modification time should not have changed (or only changed once initially)
-        # We allow for one save cycle, but not multiple
-        final_mtime = os.path.getmtime(settings_path)
+        # Nothing changed since the explicit save, so two auto-save
+        # intervals must pass without the file being written again
+        assert not wait_for_save(api_server, http, initial_saves, timeout=2 * autosave_interval + 0.5), \
+            "Settings were saved although nothing changed"
         
-        # Read both initial and final to ensure they're the same
-        # (mtime might change once on first auto-save cycle, but content should be same)
-        time.sleep(0.1)
-        with open(settings_path, 'r') as f:
+        with open(settings_file_path, 'r') as f:
             final_content = f.read()
         
         # Content should remain stable
@@ -18,9 +18,22 @@ import json
 import time
 
 
+# All tests here change the same sink/device volumes; with pytest-xdist
+# (--dist=loadgroup) they run sequentially on one worker
+pytestmark = pytest.mark.xdist_group("volume")
+
+
 # Note: test_env fixture is provided by conftest.py (session-scoped with temp HOME)
 
 
+# Patterns for parsing wpctl and pw-cli output
+_WPCTL_VOLUME_RE = re.compile(r'Volume:\s*([\d.]+)')
+_WPCTL_ID_RE = re.compile(r'^id (\d+),')
+_PW_OBJECT_RE = re.compile(r'id (\d+), type PipeWire:Interface:(\w+)')
+_DEVICE_NAME_RE = re.compile(r'device\.name = "([^"]+)"')
+_NODE_NAME_RE = re.compile(r'node\.name = "([^"]+)"')
+
+
 def get_sink_volume_wpctl(sink_id):
     """Get sink volume using wpctl get-volume. Returns float or None."""
     try:
@@ -32,7 +45,7 @@ def get_sink_volume_wpctl(sink_id):
         )
         if result.returncode == 0:
             # Output: "Volume: 0.50" or "Volume: 0.50 [MUTED]"
-            match = re.search(r'Volume:\s*([\d.]+)', result.stdout)
+            match = _WPCTL_VOLUME_RE.search(result.stdout)
             if match:
                 return float(match.group(1))
         return None
@@ -104,7 +117,7 @@ def find_volume_controls():
         
         for line in lines:
             # Look for object id
-            id_match = re.search(r'id (\d+), type PipeWire:Interface:(\w+)', line)
+            id_match = _PW_OBJECT_RE.search(line)
             if id_match:
                 current_id = int(id_match.group(1))
                 current_type = id_match.group(2)
@@ -114,7 +127,7 @@ def find_volume_controls():
             # Look for device.name or node.name
             if current_id is not None:
                 if 'device.name = "' in line:
-                    match = re.search(r'device\.name = "([^"]+)"', line)
+                    match = _DEVICE_NAME_RE.search(line)
                     if match and current_type == "Device":
                         current_name = match.group(1)
                         controls.append({
@@ -123,7 +136,7 @@ def find_volume_controls():
                             "object_type": "device"
                         })
                 elif 'node.name = "' in line and 'media.class = "Audio/Sink"' in lines[lines.index(line)-1:lines.index(line)+3]:
-                    match = re.search(r'node\.name = "([^"]+)"', line)
+                    match = _NODE_NAME_RE.search(line)
                     if match and current_type == "Node":
                         current_name = match.group(1)
                         controls.append({
@@ -141,7 +154,7 @@ def find_volume_controls():
 @pytest.fixture(scope="session")
 def volume_controls(test_env):
     """Get available volume controls"""
-    response = requests.get(f"{test_env.base_url}/api/v1/volume")
+    response = requests.get(test_env.urls.volume)
     assert response.status_code == 200
     controls = response.json()
     
@@ -156,12 +169,12 @@ class TestVolumeList:
     
     def test_list_volumes_returns_200(self, test_env):
         """Test that listing volumes returns 200"""
-        response = requests.get(f"{test_env.base_url}/api/v1/volume")
+        response = requests.get(test_env.urls.volume)
         assert response.status_code == 200
     
     def test_list_volumes_returns_array(self, test_env):
         """Test that listing volumes returns an array"""
-        response = requests.get(f"{test_env.base_url}/api/v1/volume")
+        response = requests.get(test_env.urls.volume)
         data = response.json()
         assert isinstance(data, list)
     
@@ -315,13 +328,13 @@ class TestVolumeSave:
     
     def test_save_all_volumes_returns_200(self, test_env):
         """Test saving all volumes returns 200"""
-        response = requests.post(f"{test_env.base_url}/api/v1/volume/save")
+        response = requests.post(test_env.urls.volume_save)
         assert response.status_code == 200
     
     @pytest.mark.local_only
     def test_save_all_volumes_creates_state_file(self, test_env, volume_controls):
         """Test that saving all volumes creates a state file"""
-        response = requests.post(f"{test_env.base_url}/api/v1/volume/save")
+        response = requests.post(test_env.urls.volume_save)
         assert response.status_code == 200
         
         state = test_env.read_state_file()
@@ -331,7 +344,7 @@ class TestVolumeSave:
     @pytest.mark.local_only
     def test_save_all_volumes_uses_names_as_keys(self, test_env, volume_controls):
         """Test that state file uses names as keys, not IDs"""
-        response = requests.post(f"{test_env.base_url}/api/v1/volume/save")
+        response = requests.post(test_env.urls.volume_save)
         assert response.status_code == 200
         
         state = test_env.read_state_file()
@@ -389,8 +402,7 @@ class TestVolumeStateFilePersistence:
         test_volume = 0.42
         
         # Stop server
-        test_env.stop_server()
-        time.sleep(0.5)  # Wait for server to fully stop
+        test_env.stop_server()  # Returns once the server has exited
         
         # Create config with use_state_file enabled
         # Use regex pattern that matches the device name
@@ -420,10 +432,9 @@ class TestVolumeStateFilePersistence:
                     raise
                 time.sleep(1)
         
-        time.sleep(1.5)  # Wait for volume rules to be applied
-        
-        # Check volume with retries
-        max_volume_retries = 3
+        # start_server returns once the API answers; retry briefly in case
+        # the volume rules are still being applied
+        max_volume_retries = 30
         current_volume = None
         for attempt in range(max_volume_retries):
             try:
@@ -434,7 +445,7 @@ class TestVolumeStateFilePersistence:
                         break
             except Exception:
                 pass
-            time.sleep(0.5)
+            time.sleep(0.1)
         
         # Volume should be close to the state file value if use_state_file is working
         assert current_volume is not None, "Could not read volume after server restart"
@@ -533,18 +544,18 @@ class TestDefaultSink:
     
     def test_default_sink_returns_200(self, test_env):
         """Test that /api/v1/defaults/sink returns 200 OK"""
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/sink")
+        response = requests.get(test_env.urls.default_sink)
         assert response.status_code == 200
     
     def test_default_sink_returns_json(self, test_env):
         """Test that /api/v1/defaults/sink returns valid JSON"""
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/sink")
+        response = requests.get(test_env.urls.default_sink)
         data = response.json()
         assert isinstance(data, dict)
     
     def test_default_sink_has_required_fields(self, test_env):
         """Test that response has required fields"""
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/sink")
+        response = requests.get(test_env.urls.default_sink)
         data = response.json()
         
         assert "id" in data, "Response missing 'id' field"
@@ -554,7 +565,7 @@ class TestDefaultSink:
     
     def test_default_sink_has_optional_fields(self, test_env):
         """Test that response has optional fields (may be null)"""
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/sink")
+        response = requests.get(test_env.urls.default_sink)
         data = response.json()
         
         # These fields should exist but may be null
@@ -563,13 +574,13 @@ class TestDefaultSink:
     
     def test_default_sink_id_is_positive(self, test_env):
         """Test that the sink ID is positive"""
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/sink")
+        response = requests.get(test_env.urls.default_sink)
         data = response.json()
         assert data["id"] > 0, "Sink ID should be positive"
     
     def test_default_sink_name_not_empty(self, test_env):
         """Test that the sink name is not empty"""
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/sink")
+        response = requests.get(test_env.urls.default_sink)
         data = response.json()
         assert len(data["name"]) > 0, "Sink name should not be empty"
     
@@ -577,7 +588,7 @@ class TestDefaultSink:
     def test_default_sink_matches_wpctl(self, test_env):
         """Test that API result matches wpctl inspect @DEFAULT_AUDIO_SINK@"""
         # Get from API
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/sink")
+        response = requests.get(test_env.urls.default_sink)
         api_data = response.json()
         
         # Get from wpctl
@@ -590,8 +601,8 @@ class TestDefaultSink:
         assert result.returncode == 0, "wpctl inspect failed"
         
         # Parse wpctl output for id and node.name
-        id_match = re.search(r'^id (\d+),', result.stdout)
-        name_match = re.search(r'node\.name = "([^"]+)"', result.stdout)
+        id_match = _WPCTL_ID_RE.search(result.stdout)
+        name_match = _NODE_NAME_RE.search(result.stdout)
         
         assert id_match, "Could not find id in wpctl output"
         assert name_match, "Could not find node.name in wpctl output"
@@ -608,18 +619,18 @@ class TestDefaultSource:
     
     def test_default_source_returns_200(self, test_env):
         """Test that /api/v1/defaults/source returns 200 OK"""
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/source")
+        response = requests.get(test_env.urls.default_source)
         assert response.status_code == 200
     
     def test_default_source_returns_json(self, test_env):
         """Test that /api/v1/defaults/source returns valid JSON"""
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/source")
+        response = requests.get(test_env.urls.default_source)
         data = response.json()
         assert isinstance(data, dict)
     
     def test_default_source_has_required_fields(self, test_env):
         """Test that response has required fields"""
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/source")
+        response = requests.get(test_env.urls.default_source)
         data = response.json()
         
         assert "id" in data, "Response missing 'id' field"
@@ -629,7 +640,7 @@ class TestDefaultSource:
     
     def test_default_source_has_optional_fields(self, test_env):
         """Test that response has optional fields (may be null)"""
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/source")
+        response = requests.get(test_env.urls.default_source)
         data = response.json()
         
         # These fields should exist but may be null
@@ -638,13 +649,13 @@ class TestDefaultSource:
     
     def test_default_source_id_is_positive(self, test_env):
         """Test that the source ID is positive"""
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/source")
+        response = requests.get(test_env.urls.default_source)
         data = response.json()
         assert data["id"] > 0, "Source ID should be positive"
     
     def test_default_source_name_not_empty(self, test_env):
         """Test that the source name is not empty"""
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/source")
+        response = requests.get(test_env.urls.default_source)
         data = response.json()
         assert len(data["name"]) > 0, "Source name should not be empty"
     
@@ -652,7 +663,7 @@ class TestDefaultSource:
     def test_default_source_matches_wpctl(self, test_env):
         """Test that API result matches wpctl inspect @DEFAULT_AUDIO_SOURCE@"""
         # Get from API
-        response = requests.get(f"{test_env.base_url}/api/v1/defaults/source")
+        response = requests.get(test_env.urls.default_source)
         api_data = response.json()
         
         # Get from wpctl
@@ -665,8 +676,8 @@ class TestDefaultSource:
         assert result.returncode == 0, "wpctl inspect failed"
         
         # Parse wpctl output for id and node.name
-        id_match = re.search(r'^id (\d+),', result.stdout)
-        name_match = re.search(r'node\.name = "([^"]+)"', result.stdout)
+        id_match = _WPCTL_ID_RE.search(result.stdout)
+        name_match = _NODE_NAME_RE.search(result.stdout)
         
         assert id_match, "Could not find id in wpctl output"
         assert name_match, "Could not find node.name in wpctl output"